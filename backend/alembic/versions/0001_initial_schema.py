@@ -0,0 +1,94 @@
+"""初始数据库结构
+
+此前的版本在启动时通过 Base.metadata.create_all 建表，已有数据库中的表会被跳过，
+只创建缺少的表，因此可以直接在旧数据库上执行升级。
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-06-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("username", sa.String(50), nullable=False),
+            sa.Column("email", sa.String(100), nullable=True),
+            sa.Column("hashed_password", sa.String(255), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("is_superuser", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True)
+        )
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    if "conversations" not in existing:
+        op.create_table(
+            "conversations",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("title", sa.String(200), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True)
+        )
+    
+    if "messages" not in existing:
+        op.create_table(
+            "messages",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("conversation_id", sa.String(36), sa.ForeignKey("conversations.id"), nullable=False),
+            sa.Column("role", sa.String(20), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True)
+        )
+    
+    if "ingestion_jobs" not in existing:
+        op.create_table(
+            "ingestion_jobs",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("kind", sa.String(20), nullable=False),
+            sa.Column("filename", sa.String(255), nullable=True),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("progress", sa.Float(), nullable=False),
+            sa.Column("chunks_count", sa.Integer(), nullable=False),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("created_by", sa.String(36), sa.ForeignKey("users.id"), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True)
+        )
+        op.create_index("ix_ingestion_jobs_status", "ingestion_jobs", ["status"])
+    
+    if "document_manifests" not in existing:
+        op.create_table(
+            "document_manifests",
+            sa.Column("source", sa.String(255), primary_key=True),
+            sa.Column("content_hash", sa.String(64), nullable=False),
+            sa.Column("config_hash", sa.String(64), nullable=False),
+            sa.Column("chunk_ids", sa.Text(), nullable=False),
+            sa.Column("chunks_count", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("document_manifests")
+    op.drop_index("ix_ingestion_jobs_status", table_name="ingestion_jobs")
+    op.drop_table("ingestion_jobs")
+    op.drop_table("messages")
+    op.drop_table("conversations")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,30 @@
+"""对话和消息查询的复合索引
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-01 00:00:01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_messages_conversation_id_created_at": ("messages", ["conversation_id", "created_at"]),
+    "ix_conversations_user_id_updated_at": ("conversations", ["user_id", "updated_at", "id"])
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, (table, columns) in INDEXES.items():
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,25 @@
+"""入库任务心跳
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-06-01 00:00:02
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("ingestion_jobs")}
+    if "heartbeat_at" not in columns:
+        with op.batch_alter_table("ingestion_jobs") as batch_op:
+            batch_op.add_column(sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("ingestion_jobs") as batch_op:
+        batch_op.drop_column("heartbeat_at")
@@ -1,9 +1,14 @@
 """
 聊天API路由
 """
+import asyncio
+import json
+from typing import List, Dict, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.models.user import User
 from app.models.conversation import Conversation, Message
 from app.schemas.conversation import ChatRequest, ChatResponse, Message as MessageSchema
@@ -13,14 +18,21 @@ from app.services.rag.rag_service import rag_service
 router = APIRouter(prefix="/chat", tags=["聊天"])
 
 
-@router.post("", response_model=ChatResponse)
-async def chat(
+def _prepare_conversation(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+    current_user: User,
+    db: Session
+) -> Tuple[Conversation, Message, List[Dict[str, str]]]:
     """
-    发送消息并获取AI回复
+    获取或创建对话，保存用户消息并返回对话历史
+    
+    Args:
+        request: 聊天请求
+        current_user: 当前用户
+        db: 数据库会话
+        
+    Returns:
+        (对话, 用户消息, 消息历史)
     """
     # 如果没有提供conversation_id，创建新对话
     if not request.conversation_id:
@@ -65,9 +77,71 @@ async def chat(
         for msg in messages
     ]
     
+    return conversation, user_message, message_history
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    """
+    格式化SSE事件
+    
+    Args:
+        event: 事件名称
+        data: 事件数据
+        
+    Returns:
+        SSE格式的字符串
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _save_assistant_message(conversation_id: str, content: str) -> Dict:
+    """
+    使用独立数据库会话保存AI回复
+    
+    流式响应开始前请求级数据库会话已关闭，因此不能复用依赖注入的会话。
+    
+    Args:
+        conversation_id: 对话ID
+        content: 回复内容
+        
+    Returns:
+        序列化后的消息
+    """
+    db = SessionLocal()
+    try:
+        assistant_message = Message(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=content
+        )
+        db.add(assistant_message)
+        db.commit()
+        db.refresh(assistant_message)
+        return MessageSchema.from_orm(assistant_message).model_dump(mode="json")
+    finally:
+        db.close()
+
+
+@router.post("", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    发送消息并获取AI回复
+    """
+    conversation, user_message, message_history = _prepare_conversation(
+        request, current_user, db
+    )
+    
     try:
         # 使用RAG服务生成回复
-        ai_response = await rag_service.chat(message_history, use_rag=True)
+        ai_response = await rag_service.chat(
+            message_history,
+            use_rag=True,
+            filters=request.filters.model_dump() if request.filters else None
+        )
         
         # 保存AI回复
         assistant_message = Message(
@@ -102,3 +176,66 @@ async def chat(
             response=MessageSchema.from_orm(error_message)
         )
 
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    发送消息并以SSE流式获取AI回复
+    
+    事件顺序：conversation（对话和用户消息）→ sources（参考来源）→
+    token（逐个文本片段）→ done（已保存的助手消息），出错时发送 error 事件。
+    """
+    conversation, user_message, message_history = await run_in_threadpool(
+        _prepare_conversation, request, current_user, db
+    )
+    conversation_id = conversation.id
+    filters = request.filters.model_dump() if request.filters else None
+    user_message_data = MessageSchema.from_orm(user_message).model_dump(mode="json")
+    
+    async def event_stream():
+        yield _sse_event("conversation", {
+            "conversation_id": conversation_id,
+            "message": user_message_data
+        })
+        
+        parts = []
+        error = None
+        try:
+            async for event in rag_service.chat_stream(message_history, use_rag=True, filters=filters):
+                if event["type"] == "sources":
+                    yield _sse_event("sources", {"sources": event["sources"]})
+                else:
+                    parts.append(event["content"])
+                    yield _sse_event("token", {"content": event["content"]})
+        except asyncio.CancelledError:
+            # 客户端断开连接，保存已生成的部分回复；保存不随请求一起取消
+            if parts:
+                await asyncio.shield(run_in_threadpool(_save_assistant_message, conversation_id, "".join(parts)))
+            raise
+        except Exception as e:
+            error = str(e)
+        
+        if error is not None:
+            content = f"抱歉，处理您的请求时出现错误：{error}"
+        else:
+            content = "".join(parts)
+        
+        assistant_message_data = await run_in_threadpool(_save_assistant_message, conversation_id, content)
+        
+        if error is not None:
+            yield _sse_event("error", {"detail": error, "response": assistant_message_data})
+        else:
+            yield _sse_event("done", {"response": assistant_message_data})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
@@ -1,9 +1,11 @@
 """
 对话API路由
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, or_, and_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
 from app.models.user import User
 from app.models.conversation import Conversation, Message
@@ -21,34 +23,73 @@ router = APIRouter(prefix="/conversations", tags=["对话管理"])
 
 @router.get("", response_model=List[ConversationList])
 async def get_conversations(
-    skip: int = 0,
     limit: int = 100,
+    before_updated_at: Optional[datetime] = None,
+    before_id: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     获取用户的对话列表
+    
+    按更新时间倒序分页，获取下一页时传入上一页最后一项的 updated_at 和 id
+    作为 before_updated_at 和 before_id（键集分页，翻页开销与页码无关）
+    
+    skip 为兼容旧客户端保留的偏移分页参数，不能与键集分页参数同时使用
     """
-    conversations = db.query(Conversation).filter(
-        Conversation.user_id == current_user.id
-    ).order_by(Conversation.updated_at.desc()).offset(skip).limit(limit).all()
-    
-    # 添加消息数量
-    result = []
-    for conv in conversations:
-        message_count = db.query(Message).filter(
-            Message.conversation_id == conv.id
-        ).count()
-        
-        result.append(ConversationList(
-            id=conv.id,
-            title=conv.title,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at,
-            message_count=message_count
-        ))
-    
-    return result
+    if before_id is not None and before_updated_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="before_id 需要与 before_updated_at 一起使用"
+        )
+    if skip and before_updated_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="skip 不能与 before_updated_at、before_id 同时使用"
+        )
+    
+    query = db.query(Conversation).filter(Conversation.user_id == current_user.id)
+    
+    if before_updated_at is not None:
+        if before_id is not None:
+            query = query.filter(or_(
+                Conversation.updated_at < before_updated_at,
+                and_(Conversation.updated_at == before_updated_at, Conversation.id < before_id)
+            ))
+        else:
+            query = query.filter(Conversation.updated_at < before_updated_at)
+    
+    page = query.order_by(
+        Conversation.updated_at.desc(),
+        Conversation.id.desc()
+    ).offset(skip).limit(limit).subquery()
+    
+    # 先取出当前页的对话，再在同一条查询中统计这些对话的消息数量
+    rows = db.query(
+        page.c.id,
+        page.c.title,
+        page.c.created_at,
+        page.c.updated_at,
+        func.count(Message.id).label("message_count")
+    ).outerjoin(
+        Message, Message.conversation_id == page.c.id
+    ).group_by(
+        page.c.id, page.c.title, page.c.created_at, page.c.updated_at
+    ).order_by(
+        page.c.updated_at.desc(), page.c.id.desc()
+    ).all()
+    
+    return [
+        ConversationList(
+            id=row.id,
+            title=row.title,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            message_count=row.message_count
+        )
+        for row in rows
+    ]
 
 
 @router.post("", response_model=ConversationSchema)
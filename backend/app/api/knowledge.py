@@ -1,30 +1,63 @@
 """
 知识库管理API路由
 """
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
 import os
 import shutil
 from pathlib import Path
+from app.core.config import settings
+from app.core.database import get_db
 from app.models.user import User
+from app.models.ingestion_job import IngestionJob
+from app.schemas.ingestion_job import IngestionJob as IngestionJobSchema
+from app.schemas.knowledge import DocumentPurgeRequest
 from app.api.auth import get_current_user
-from app.services.rag.document_processor import document_processor
 from app.services.vector.chroma_service import chroma_service
+from app.services.rag.rag_service import rag_service
+from app.services.rag.document_processor import document_processor
+from app.services.ingestion.job_queue import ingestion_queue
+from app.services.ingestion.manifest import manifest_service
 
 router = APIRouter(prefix="/knowledge", tags=["知识库管理"])
 
 # 文档存储目录
-UPLOAD_DIR = Path("data/documents")
+UPLOAD_DIR = Path(settings.DOCUMENTS_DIR)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
-@router.post("/upload")
+def _find_document(source: str) -> Optional[Path]:
+    """
+    在文档目录（包括分类子目录）中查找文档
+    
+    Args:
+        source: 文档来源（相对文档目录的路径）；兼容只传文件名，文件名只对应一个文档时才匹配
+        
+    Returns:
+        文件路径，不存在或文件名对应多个文档时返回None
+    """
+    by_name = []
+    for file_path in document_processor.iter_files(str(UPLOAD_DIR)):
+        if document_processor.read_source(file_path) == source:
+            return Path(file_path)
+        if Path(file_path).name == source:
+            by_name.append(Path(file_path))
+    return by_name[0] if len(by_name) == 1 else None
+
+
+@router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    category: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
-    上传法规文档
+    上传法规文档（保存文件后提交后台入库任务，通过任务ID查询处理进度）
+    
+    指定分类时文件保存到文档目录下同名的子目录中，分类会写入文本块元数据用于检索过滤
     """
     # 检查文件类型
     allowed_extensions = ['.pdf', '.docx', '.doc', '.txt']
@@ -36,37 +69,95 @@ async def upload_document(
             detail=f"不支持的文件类型。支持的类型: {', '.join(allowed_extensions)}"
         )
     
-    # 保存文件
-    file_path = UPLOAD_DIR / file.filename
+    category = (category or "").strip()
+    if category and (Path(category).name != category or category in (".", "..")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="分类名称不能包含路径分隔符"
+        )
+    
+    # 保存文件：先写入临时文件再替换，写入失败时保留原有文档
+    target_dir = UPLOAD_DIR / category if category else UPLOAD_DIR
+    target_dir.mkdir(parents=True, exist_ok=True)
+    file_path = target_dir / file.filename
+    temp_path = target_dir / f".{file.filename}.uploading"
     
     try:
-        with open(file_path, "wb") as buffer:
+        with open(temp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
-        
-        # 处理文档
-        result = document_processor.process_document(str(file_path))
-        
-        # 添加到向量数据库
-        chroma_service.add_documents(
-            documents=result["chunks"],
-            metadatas=result["metadatas"]
-        )
-        
-        return {
-            "message": "文档上传成功",
-            "filename": file.filename,
-            "chunks_count": len(result["chunks"])
-        }
-    
+        os.replace(temp_path, file_path)
     except Exception as e:
-        # 如果处理失败，删除文件
-        if file_path.exists():
-            file_path.unlink()
+        if temp_path.exists():
+            temp_path.unlink()
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"文档处理失败: {str(e)}"
+            detail=f"文档保存失败: {str(e)}"
         )
+    
+    # 同名文档更换分类时，新文件保存成功后再删除旧位置的文件及其向量（来源不同，不会被新文件覆盖）
+    moved = []
+    for existing in document_processor.iter_files(str(UPLOAD_DIR)):
+        existing = Path(existing)
+        if existing.name == file.filename and existing != file_path:
+            existing.unlink()
+            moved.append(document_processor.read_source(str(existing)))
+    if moved:
+        await run_in_threadpool(manifest_service.remove, db, moved)
+    
+    # 创建入库任务
+    job = IngestionJob(
+        kind="upload",
+        filename=file_path.relative_to(UPLOAD_DIR).as_posix(),
+        created_by=current_user.id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    
+    ingestion_queue.enqueue(job.id)
+    
+    return {
+        "message": "文档已上传，正在后台处理",
+        "filename": file.filename,
+        "category": category or None,
+        "job_id": job.id,
+        "status": job.status
+    }
+
+
+@router.get("/jobs", response_model=List[IngestionJobSchema])
+async def list_jobs(
+    limit: int = 50,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取最近的入库任务列表
+    """
+    return db.query(IngestionJob).order_by(
+        IngestionJob.created_at.desc()
+    ).limit(limit).all()
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobSchema)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取入库任务的状态和进度
+    """
+    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    
+    return job
 
 
 @router.get("/documents")
@@ -76,13 +167,15 @@ async def list_documents(current_user: User = Depends(get_current_user)):
     """
     documents = []
     
-    for file_path in UPLOAD_DIR.iterdir():
-        if file_path.is_file():
-            documents.append({
-                "filename": file_path.name,
-                "size": file_path.stat().st_size,
-                "created_at": file_path.stat().st_ctime
-            })
+    for file_path in document_processor.iter_files(str(UPLOAD_DIR)):
+        stat = os.stat(file_path)
+        documents.append({
+            "source": document_processor.read_source(file_path),
+            "filename": Path(file_path).name,
+            "category": document_processor.read_category(file_path),
+            "size": stat.st_size,
+            "created_at": stat.st_ctime
+        })
     
     return {
         "documents": documents,
@@ -90,25 +183,31 @@ async def list_documents(current_user: User = Depends(get_current_user)):
     }
 
 
-@router.delete("/documents/{filename}")
+@router.delete("/documents/{source:path}")
 async def delete_document(
-    filename: str,
-    current_user: User = Depends(get_current_user)
+    source: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
-    删除文档（注意：这只会删除文件，不会从向量数据库中删除）
+    删除文档，同时删除其在向量数据库中的所有文本块
+    
+    source 为文档列表返回的来源（相对文档目录的路径），文件名唯一时也可以只传文件名
     """
-    file_path = UPLOAD_DIR / filename
+    file_path = _find_document(source)
     
-    if not file_path.exists():
+    if file_path is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="文档不存在"
         )
     
     try:
+        # 先删除文件再删除向量，进行中的重建不会把该文档写回新集合
+        source = document_processor.read_source(str(file_path))
         file_path.unlink()
-        return {"message": "文档已删除"}
+        chunks_removed = await run_in_threadpool(manifest_service.remove, db, [source])
+        return {"message": "文档已删除", "chunks_removed": chunks_removed}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -116,6 +215,52 @@ async def delete_document(
         )
 
 
+@router.post("/documents/purge")
+async def purge_documents(
+    request: DocumentPurgeRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    批量删除文档的向量（可选同时删除文件），用于清理已废止的法规
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="只有管理员可以执行此操作"
+        )
+    
+    try:
+        # 文件已不存在时按传入的来源删除残留的向量
+        file_paths = {source: _find_document(source) for source in request.filenames}
+        sources = [
+            document_processor.read_source(str(file_path)) if file_path is not None else source
+            for source, file_path in file_paths.items()
+        ]
+        
+        # 先删除文件再删除向量，进行中的重建不会把这些文档写回新集合
+        files_deleted = []
+        if request.delete_files:
+            for source, file_path in file_paths.items():
+                if file_path is not None:
+                    file_path.unlink()
+                    files_deleted.append(source)
+        
+        chunks_removed = await run_in_threadpool(manifest_service.remove, db, sources)
+        
+        return {
+            "message": "文档已批量删除",
+            "documents": len(request.filenames),
+            "files_deleted": files_deleted,
+            "chunks_removed": chunks_removed
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量删除失败: {str(e)}"
+        )
+
+
 @router.get("/stats")
 async def get_knowledge_stats(current_user: User = Depends(get_current_user)):
     """
@@ -123,7 +268,7 @@ async def get_knowledge_stats(current_user: User = Depends(get_current_user)):
     """
     try:
         vector_count = chroma_service.count()
-        document_count = len(list(UPLOAD_DIR.iterdir()))
+        document_count = sum(1 for _ in document_processor.iter_files(str(UPLOAD_DIR)))
         
         return {
             "document_count": document_count,
@@ -136,10 +281,30 @@ async def get_knowledge_stats(current_user: User = Depends(get_current_user)):
         )
 
 
-@router.post("/rebuild")
-async def rebuild_knowledge_base(current_user: User = Depends(get_current_user)):
+@router.get("/cache/stats")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
     """
-    重建知识库（重新处理所有文档）
+    获取查询向量缓存、文本块向量缓存和语义回答缓存的统计信息
+    """
+    chunk_cache = chroma_service.chunk_cache
+    return {
+        "query_embedding_cache": chroma_service.query_cache.stats(),
+        "chunk_embedding_cache": chunk_cache.stats() if chunk_cache else {"enabled": False},
+        "answer_cache": rag_service.answer_cache.stats()
+    }
+
+
+@router.post("/rebuild", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_knowledge_base(
+    incremental: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    重建知识库（重新处理所有文档），作为后台任务执行，通过任务ID查询进度
+    
+    全量重建写入新的版本集合，完成后原子切换，重建期间查询不受影响；
+    incremental 为 true 时只重新索引新增或内容变化的文档，并删除已移除文档的向量
     """
     if not current_user.is_superuser:
         raise HTTPException(
@@ -147,35 +312,18 @@ async def rebuild_knowledge_base(current_user: User = Depends(get_current_user))
             detail="只有管理员可以执行此操作"
         )
     
-    try:
-        # 删除现有集合
-        chroma_service.delete_collection()
-        
-        # 重新初始化
-        from app.services.vector.chroma_service import ChromaService
-        global chroma_service
-        chroma_service = ChromaService()
-        
-        # 处理所有文档
-        results = document_processor.process_directory(str(UPLOAD_DIR))
-        
-        total_chunks = 0
-        for result in results:
-            chroma_service.add_documents(
-                documents=result["chunks"],
-                metadatas=result["metadatas"]
-            )
-            total_chunks += len(result["chunks"])
-        
-        return {
-            "message": "知识库重建成功",
-            "documents_processed": len(results),
-            "total_chunks": total_chunks
-        }
+    job = IngestionJob(
+        kind="sync" if incremental else "rebuild",
+        created_by=current_user.id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
     
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"重建知识库失败: {str(e)}"
-        )
-
+    ingestion_queue.enqueue(job.id)
+    
+    return {
+        "message": "知识库同步任务已提交" if incremental else "知识库重建任务已提交",
+        "job_id": job.id,
+        "status": job.status
+    }
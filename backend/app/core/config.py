@@ -28,21 +28,96 @@ class Settings(BaseSettings):
     # Ollama配置
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.1:8b"
-    OLLAMA_TIMEOUT: int = 120
+    OLLAMA_TIMEOUT: int = 120  # 读取超时（秒），流式响应时为两个token之间的最长间隔
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_WRITE_TIMEOUT: float = 30.0
+    OLLAMA_POOL_TIMEOUT: float = 10.0
+    OLLAMA_MAX_CONNECTIONS: int = 100
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OLLAMA_KEEPALIVE_EXPIRY: float = 60.0
+    OLLAMA_HTTP2: bool = True  # 需要安装h2，未安装时自动回退到HTTP/1.1
+    
+    # 向量存储配置
+    VECTOR_STORE_BACKEND: str = "chroma_http"  # chroma_http：ChromaDB服务；chroma_local：进程内ChromaDB；local：本地内存映射索引
+    CHROMA_PERSIST_DIR: str = "data/chroma"  # chroma_local 后端的数据目录
+    LOCAL_INDEX_DIR: str = "data/vector_index"  # local 后端的索引目录
+    LOCAL_INDEX_QUANTIZATION: str = "none"  # local 后端的紧凑副本：none、float16 或 int8
+    LOCAL_INDEX_RESCORE_FACTOR: int = 4  # 量化粗排的候选数量为结果数量的倍数，候选用float32原始向量重新打分
     
     # ChromaDB配置
     CHROMA_HOST: str = "localhost"
     CHROMA_PORT: int = 8001
     CHROMA_COLLECTION_NAME: str = "regulations"
+    CHROMA_IO_WORKERS: int = 8  # 执行ChromaDB请求的线程数，避免阻塞事件循环
+    CHROMA_ALIAS_REFRESH_SECONDS: float = 10.0  # 重新解析集合别名的间隔（秒）
+    CHROMA_KEEP_VERSIONS: int = 0  # 重建后保留的旧版本集合数量
+    CHROMA_UPSERT_BATCH_SIZE: int = 256  # 每次upsert请求的最大文本块数量
+    CHROMA_UPSERT_CONCURRENCY: int = 4  # 并发写入的批次数
+    CHROMA_UPSERT_RETRIES: int = 5  # 写入失败时的最大尝试次数
+    CHROMA_UPSERT_RETRY_BACKOFF: float = 0.5  # 重试退避的基础时间（秒）
     
     # RAG配置
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
     TOP_K: int = 5
+    CONTEXT_MAX_TOKENS: int = 3000  # 提示词中参考资料的token预算（中文按每字1个token估算），0表示不限制
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8  # 参考资料近重复判定的Jaccard相似度阈值
+    
+    # 混合检索配置
+    RETRIEVAL_MODE: str = "hybrid"  # vector：仅向量检索；hybrid：向量检索与BM25关键词检索融合
+    FUSION_STRATEGY: str = "rrf"  # rrf：倒数排名融合；weighted：归一化得分加权融合
+    RRF_K: int = 60  # RRF平滑常数
+    HYBRID_VECTOR_WEIGHT: float = 0.5  # 向量检索的权重，关键词检索权重为 1 - 该值
+    HYBRID_CANDIDATE_MULTIPLIER: int = 4  # 每路检索的候选数量为 top_k 的倍数
+    KEYWORD_INDEX_ENABLED: bool = True  # 写入向量时同步维护关键词索引
+    KEYWORD_INDEX_PATH: str = "data/keyword_index.db"
+    KEYWORD_TOKENIZER: str = "auto"  # auto：已安装jieba时使用jieba；jieba；bigram：中文字符二元组
+    
+    # 重排序配置
+    RERANK_ENABLED: bool = False  # 使用交叉编码器对候选重新排序
+    RERANKER_MODEL: str = "BAAI/bge-reranker-base"
+    RERANKER_DEVICE: str = "cpu"
+    RERANK_CANDIDATES: int = 20  # 重排序前检索的候选数量，重排序后保留 top_k 条
+    RERANK_BATCH_SIZE: int = 16  # 每批打分的候选数量
+    RERANK_WORKERS: int = 2  # 打分线程数
+    
+    # 文档入库配置
+    DOCUMENTS_DIR: str = "data/documents"
+    INGESTION_JOB_WORKERS: int = 1  # 同时执行的入库任务数
+    INGESTION_JOB_LEASE_SECONDS: int = 300  # 执行中的任务超过该时间未更新心跳时，启动时将其视为中断并重新执行
+    INGESTION_PARSE_WORKERS: int = 0  # 解析文档的进程数，0表示使用CPU核数，1表示不使用进程池
+    INGESTION_BATCH_SIZE: int = 512  # 每批编码和写入向量数据库的文本块数量，批内按长度排序分桶编码
+    INGESTION_QUEUE_SIZE: int = 4  # 入库流水线各阶段之间队列的最大长度
     
     # 嵌入模型配置
     EMBEDDING_MODEL: str = "BAAI/bge-large-zh-v1.5"
     EMBEDDING_DEVICE: str = "cpu"
+    EMBEDDING_BACKEND: str = "sentence_transformers"  # sentence_transformers：PyTorch推理；onnx：ONNX Runtime推理
+    EMBEDDING_ONNX_DIR: str = "data/onnx_models"  # ONNX模型导出目录，首次使用时自动导出
+    EMBEDDING_ONNX_QUANTIZE: bool = False  # 使用动态int8量化的ONNX模型
+    EMBEDDING_ONNX_THREADS: int = 0  # 每次ONNX推理使用的线程数，0表示由ONNX Runtime决定
+    EMBEDDING_WORKERS: int = 2  # 执行向量编码的线程数
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # 查询向量动态批处理的最大批次大小
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # 查询向量动态批处理的收集窗口（毫秒）
+    EMBEDDING_BULK_BATCH_SIZE: int = 32  # 入库批量编码时每个模型批次的文本块数量
+    EMBEDDING_BULK_THREADS: int = 1  # ONNX后端入库批量编码并行执行的批次数，ONNX Runtime本身已多线程，通常保持1
+    
+    # 查询向量缓存配置
+    QUERY_EMBEDDING_CACHE_SIZE: int = 10000  # 最大缓存条目数，0表示禁用
+    QUERY_EMBEDDING_CACHE_TTL: int = 0  # 缓存有效期（秒），0表示永不过期
+    
+    # 文本块向量缓存配置
+    CHUNK_EMBEDDING_CACHE_ENABLED: bool = True  # 按（模型, 文本哈希）持久化入库文本块的向量
+    CHUNK_EMBEDDING_CACHE_PATH: str = "data/embedding_cache.db"
+    
+    # 语义回答缓存配置
+    ANSWER_CACHE_SIZE: int = 1000  # 最大缓存条目数，0表示禁用
+    ANSWER_CACHE_TTL: int = 3600  # 缓存有效期（秒），0表示永不过期
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # 命中所需的最小余弦相似度
+    
+    # 启动预热配置
+    WARMUP_ON_STARTUP: bool = True  # 启动后在后台加载模型、连接向量存储，完成前 /ready 返回503
+    WARMUP_RETRY_SECONDS: float = 10.0  # 预热失败后的重试间隔（秒）
     
     # CORS配置
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:5173"]
@@ -1,6 +1,7 @@
 """
 数据库连接模块
 """
+from pathlib import Path
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -18,6 +19,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # 创建基类
 Base = declarative_base()
 
+# Alembic配置文件，位于 backend 目录
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
 
 def get_db():
     """获取数据库会话"""
@@ -27,3 +31,20 @@ def get_db():
     finally:
         db.close()
 
+
+def run_migrations() -> None:
+    """
+    使用Alembic将数据库结构升级到最新版本
+    
+    新数据库会创建全部表；此前通过 create_all 建立的数据库只补充缺少的表和索引，
+    已有数据保持不变。
+    """
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    # 沿用应用的日志配置
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
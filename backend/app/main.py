@@ -1,14 +1,43 @@
 """
 FastAPI主应用
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import run_migrations
 from app.api import auth, conversations, chat, knowledge
 
-# 创建数据库表
-Base.metadata.create_all(bind=engine)
+# 将数据库结构升级到最新版本
+run_migrations()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时创建共享资源，关闭时释放"""
+    from app.services.llm.ollama_service import ollama_service
+    from app.services.vector.chroma_service import chroma_service
+    from app.services.ingestion.job_queue import ingestion_queue
+    from app.services.rag.reranker import reranker
+    from app.services.warmup import warmup_service
+    
+    await ollama_service.startup()
+    await ingestion_queue.start()
+    
+    # 模型加载和向量存储连接在后台预热，不阻塞服务启动，预热完成前 /ready 返回503
+    warmup_task = asyncio.create_task(warmup_service.run()) if settings.WARMUP_ON_STARTUP else None
+    try:
+        yield
+    finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+        await ingestion_queue.stop()
+        await ollama_service.shutdown()
+        chroma_service.shutdown()
+        reranker.shutdown()
+
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -16,7 +45,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="基于本地LLM和RAG技术的企业级法规智能检索系统",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # 配置CORS
@@ -59,6 +89,15 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """就绪检查：嵌入模型、向量存储等组件预热完成后返回200，否则返回503"""
+    from app.services.warmup import warmup_service
+    
+    status = warmup_service.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -3,6 +3,8 @@
 """
 from app.models.user import User
 from app.models.conversation import Conversation, Message
+from app.models.ingestion_job import IngestionJob
+from app.models.document_manifest import DocumentManifest
 
-__all__ = ["User", "Conversation", "Message"]
+__all__ = ["User", "Conversation", "Message", "IngestionJob", "DocumentManifest"]
 
@@ -1,7 +1,7 @@
 """
 对话数据模型
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -16,6 +16,10 @@ def generate_uuid():
 class Conversation(Base):
     """对话模型"""
     __tablename__ = "conversations"
+    __table_args__ = (
+        # 对话列表按用户过滤、按更新时间和ID键集分页
+        Index("ix_conversations_user_id_updated_at", "user_id", "updated_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
@@ -34,6 +38,10 @@ class Conversation(Base):
 class Message(Base):
     """消息模型"""
     __tablename__ = "messages"
+    __table_args__ = (
+        # 按对话读取消息历史并按创建时间排序，也用于统计对话的消息数量
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     conversation_id = Column(String(36), ForeignKey("conversations.id"), nullable=False)
@@ -0,0 +1,31 @@
+"""
+文档索引清单数据模型
+"""
+import json
+from sqlalchemy import Column, String, DateTime, Text, Integer
+from datetime import datetime
+from app.core.database import Base
+
+
+class DocumentManifest(Base):
+    """文档索引清单模型，记录每个文档已写入向量数据库的内容和文本块"""
+    __tablename__ = "document_manifests"
+    
+    source = Column(String(255), primary_key=True)  # 文件名，与向量元数据中的source一致
+    content_hash = Column(String(64), nullable=False)  # 文件内容哈希
+    config_hash = Column(String(64), nullable=False)  # 分块和嵌入配置哈希
+    chunk_ids = Column(Text, nullable=False, default="[]")  # 文本块ID列表（JSON）
+    chunks_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def get_chunk_ids(self):
+        """获取文本块ID列表"""
+        return json.loads(self.chunk_ids or "[]")
+    
+    def set_chunk_ids(self, ids):
+        """设置文本块ID列表"""
+        self.chunk_ids = json.dumps(list(ids))
+        self.chunks_count = len(ids)
+    
+    def __repr__(self):
+        return f"<DocumentManifest {self.source}>"
@@ -0,0 +1,33 @@
+"""
+文档入库任务数据模型
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Float
+from datetime import datetime
+import uuid
+from app.core.database import Base
+
+
+def generate_uuid():
+    """生成UUID字符串"""
+    return str(uuid.uuid4())
+
+
+class IngestionJob(Base):
+    """文档入库任务模型"""
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    kind = Column(String(20), nullable=False, default="upload")  # 任务类型
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending / running / succeeded / failed
+    progress = Column(Float, nullable=False, default=0.0)  # 0.0 ~ 1.0
+    chunks_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_by = Column(String(36), ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # 执行中的任务定期更新，超过租约时间未更新的任务视为已中断
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<IngestionJob {self.kind} {self.status}>"
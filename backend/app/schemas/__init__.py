@@ -9,9 +9,12 @@ from app.schemas.conversation import (
     ConversationCreate,
     ConversationUpdate,
     ConversationList,
+    SearchFilters,
     ChatRequest,
     ChatResponse
 )
+from app.schemas.ingestion_job import IngestionJob
+from app.schemas.knowledge import DocumentPurgeRequest
 
 __all__ = [
     "User",
@@ -25,7 +28,10 @@ __all__ = [
     "ConversationCreate",
     "ConversationUpdate",
     "ConversationList",
+    "SearchFilters",
     "ChatRequest",
-    "ChatResponse"
+    "ChatResponse",
+    "IngestionJob",
+    "DocumentPurgeRequest"
 ]
 
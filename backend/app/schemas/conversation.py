@@ -3,7 +3,7 @@
 """
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 
 
 class MessageBase(BaseModel):
@@ -66,10 +66,20 @@ class ConversationList(BaseModel):
         from_attributes = True
 
 
+class SearchFilters(BaseModel):
+    """检索过滤条件模式"""
+    sources: Optional[List[str]] = None  # 限定的文档（来源，即相对文档目录的路径）
+    categories: Optional[List[str]] = None  # 限定的分类
+    effective_from: Optional[date] = None  # 施行日期下限
+    effective_to: Optional[date] = None  # 施行日期上限
+    in_force: bool = False  # 只检索已施行的法规
+
+
 class ChatRequest(BaseModel):
     """聊天请求模式"""
     conversation_id: Optional[str] = None
     message: str
+    filters: Optional[SearchFilters] = None
 
 
 class ChatResponse(BaseModel):
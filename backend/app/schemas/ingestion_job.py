@@ -0,0 +1,23 @@
+"""
+文档入库任务数据模式
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class IngestionJob(BaseModel):
+    """入库任务响应模式"""
+    id: str
+    kind: str
+    filename: Optional[str] = None
+    status: str
+    progress: float
+    chunks_count: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
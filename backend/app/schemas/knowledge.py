@@ -0,0 +1,11 @@
+"""
+知识库管理数据模式
+"""
+from pydantic import BaseModel
+from typing import List
+
+
+class DocumentPurgeRequest(BaseModel):
+    """批量删除文档请求模式"""
+    filenames: List[str]  # 文档来源（相对文档目录的路径），文件名唯一时也可以只传文件名
+    delete_files: bool = True
@@ -0,0 +1,299 @@
+"""
+文档入库任务队列模块
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Callable, Dict
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.ingestion_job import IngestionJob
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app.services.ingestion.pipeline import IngestionPipeline
+from app.services.ingestion.manifest import manifest_service
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionJobQueue:
+    """
+    文档入库任务队列
+    
+    任务持久化在数据库中，由后台工作协程取出后在线程池中执行，
+    不占用API请求；应用重启后会恢复未完成的任务。
+    
+    多个API进程共享同一任务表：任务通过条件更新原子地领取，只有一个进程会执行；
+    执行中的任务定期更新心跳，启动时只恢复心跳超过 INGESTION_JOB_LEASE_SECONDS 的中断任务。
+    """
+    
+    def __init__(self):
+        self.workers = max(1, settings.INGESTION_JOB_WORKERS)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._handlers: Dict[str, Callable[[Session, IngestionJob, Callable[[float], None]], Dict]] = {
+            "upload": self._handle_upload,
+            "rebuild": self._handle_rebuild,
+            "sync": self._handle_sync
+        }
+    
+    async def start(self) -> None:
+        """启动工作协程并恢复未完成的任务，在应用启动时调用"""
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="ingestion"
+        )
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        
+        for job_id in self._recover_jobs():
+            self._queue.put_nowait(job_id)
+    
+    async def stop(self) -> None:
+        """停止工作协程，在应用关闭时调用；正在执行的任务会在下次启动时恢复"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def enqueue(self, job_id: str) -> None:
+        """
+        提交任务
+        
+        Args:
+            job_id: 任务ID
+        """
+        self._queue.put_nowait(job_id)
+    
+    def _recover_jobs(self) -> List[str]:
+        """
+        将心跳超时的中断任务重置为待执行状态，返回所有待执行的任务
+        
+        其他进程正在执行的任务仍在更新心跳，不会被重置。
+        """
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.INGESTION_JOB_LEASE_SECONDS)
+            last_seen = func.coalesce(IngestionJob.heartbeat_at, IngestionJob.started_at)
+            db.query(IngestionJob).filter(
+                IngestionJob.status == "running",
+                or_(last_seen.is_(None), last_seen < cutoff)
+            ).update({"status": "pending", "progress": 0.0}, synchronize_session=False)
+            db.commit()
+            
+            jobs = db.query(IngestionJob.id).filter(
+                IngestionJob.status == "pending"
+            ).order_by(IngestionJob.created_at.asc()).all()
+            return [job.id for job in jobs]
+        finally:
+            db.close()
+    
+    def _claim_job(self, db: Session, job_id: str) -> bool:
+        """
+        原子地领取待执行的任务
+        
+        Args:
+            db: 数据库会话
+            job_id: 任务ID
+        
+        Returns:
+            是否领取成功，任务已被其他进程领取或不存在时返回False
+        """
+        now = datetime.utcnow()
+        claimed = db.query(IngestionJob).filter(
+            IngestionJob.id == job_id,
+            IngestionJob.status == "pending"
+        ).update({
+            "status": "running",
+            "started_at": now,
+            "heartbeat_at": now,
+            "error": None
+        }, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+    
+    @staticmethod
+    def _heartbeat(job_id: str, stop: threading.Event) -> None:
+        """在后台线程中定期更新执行中任务的心跳，直到任务结束"""
+        interval = max(1.0, settings.INGESTION_JOB_LEASE_SECONDS / 3)
+        while not stop.wait(interval):
+            db = SessionLocal()
+            try:
+                db.query(IngestionJob).filter(
+                    IngestionJob.id == job_id,
+                    IngestionJob.status == "running"
+                ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+                db.commit()
+            except Exception:
+                logger.warning("更新入库任务心跳失败: %s", job_id, exc_info=True)
+            finally:
+                db.close()
+    
+    async def _worker(self) -> None:
+        """工作协程：依次取出任务并在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await loop.run_in_executor(self._executor, self._run_job, job_id)
+            except Exception:
+                logger.exception("入库任务执行异常: %s", job_id)
+            finally:
+                self._queue.task_done()
+    
+    def _run_job(self, job_id: str) -> None:
+        """
+        执行任务并记录状态
+        
+        Args:
+            job_id: 任务ID
+        """
+        db = SessionLocal()
+        stop_heartbeat = threading.Event()
+        try:
+            if not self._claim_job(db, job_id):
+                return
+            job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+            
+            threading.Thread(
+                target=self._heartbeat,
+                args=(job_id, stop_heartbeat),
+                name="ingestion-heartbeat",
+                daemon=True
+            ).start()
+            
+            def report_progress(progress: float) -> None:
+                job.progress = min(max(progress, 0.0), 1.0)
+                db.commit()
+            
+            try:
+                handler = self._handlers[job.kind]
+                stats = handler(db, job, report_progress)
+                job.chunks_count = stats["total_chunks"]
+                job.status = "succeeded"
+                job.progress = 1.0
+                
+                # 部分文档处理失败不影响任务整体成功，记录失败的文档
+                if stats["failures"]:
+                    job.error = "以下文档处理失败: " + "; ".join(
+                        f"{failure['source']} - {failure['error']}" for failure in stats["failures"]
+                    )
+            except Exception as e:
+                logger.exception("入库任务失败: %s", job_id)
+                job.status = "failed"
+                job.error = str(e)
+            
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        finally:
+            stop_heartbeat.set()
+            db.close()
+    
+    def _handle_upload(
+        self,
+        db: Session,
+        job: IngestionJob,
+        report_progress: Callable[[float], None]
+    ) -> Dict:
+        """
+        处理上传的文档：解析、分割、编码并写入向量数据库，同名文档的旧文本块会被替换
+        
+        Args:
+            db: 数据库会话
+            job: 入库任务
+            report_progress: 进度回调
+        
+        Returns:
+            流水线统计信息
+        """
+        file_path = Path(settings.DOCUMENTS_DIR) / job.filename
+        
+        def on_progress(stats: Dict) -> None:
+            if stats["chunks_parsed"]:
+                report_progress(0.1 + 0.9 * stats["total_chunks"] / stats["chunks_parsed"])
+        
+        try:
+            # 单个文件无需进程池，在任务线程中解析
+            stats = manifest_service.index_files(
+                db,
+                [str(file_path)],
+                pipeline=IngestionPipeline(parse_workers=1),
+                on_progress=on_progress
+            )
+            
+            if stats["failures"]:
+                raise RuntimeError(stats["failures"][0]["error"])
+            
+            return stats
+        
+        except Exception:
+            # 如果处理失败，删除文件
+            if file_path.exists():
+                file_path.unlink()
+            raise
+    
+    @staticmethod
+    def _document_progress(report_progress: Callable[[float], None]) -> Callable[[Dict], None]:
+        """按已解析的文档数占文档总数的比例报告进度"""
+        def on_progress(stats: Dict) -> None:
+            if stats.get("documents_total"):
+                done = stats["documents_processed"] + len(stats["failures"])
+                report_progress(0.99 * done / stats["documents_total"])
+        return on_progress
+    
+    def _handle_rebuild(
+        self,
+        db: Session,
+        job: IngestionJob,
+        report_progress: Callable[[float], None]
+    ) -> Dict:
+        """
+        全量重建知识库（写入新版本集合后切换别名）
+        
+        Args:
+            db: 数据库会话
+            job: 入库任务
+            report_progress: 进度回调
+        
+        Returns:
+            流水线统计信息
+        """
+        return manifest_service.rebuild(
+            db,
+            settings.DOCUMENTS_DIR,
+            on_progress=self._document_progress(report_progress)
+        )
+    
+    def _handle_sync(
+        self,
+        db: Session,
+        job: IngestionJob,
+        report_progress: Callable[[float], None]
+    ) -> Dict:
+        """
+        增量同步知识库
+        
+        Args:
+            db: 数据库会话
+            job: 入库任务
+            report_progress: 进度回调
+        
+        Returns:
+            流水线统计信息
+        """
+        return manifest_service.sync(
+            db,
+            settings.DOCUMENTS_DIR,
+            on_progress=self._document_progress(report_progress)
+        )
+
+
+# 创建全局实例
+ingestion_queue = IngestionJobQueue()
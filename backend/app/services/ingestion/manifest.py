@@ -0,0 +1,355 @@
+"""
+文档索引清单与增量同步模块
+"""
+import hashlib
+import json
+import threading
+from typing import List, Dict, Iterable, Optional, Callable, Any
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.document_manifest import DocumentManifest
+from app.services.rag.document_processor import (
+    document_processor,
+    file_content_hash,
+    TEXT_SEPARATORS,
+    METADATA_VERSION
+)
+from app.services.vector.chroma_service import chroma_service
+from app.services.vector.embedder import embedder_name
+from app.services.ingestion.pipeline import IngestionPipeline
+
+
+def chunking_config_hash() -> str:
+    """
+    计算分块和嵌入配置的哈希，配置变化时所有文档都需要重新索引；
+    嵌入模型标识包含推理后端和量化方式，切换到ONNX或int8模型时重新编码所有文档
+    
+    Returns:
+        SHA-256十六进制字符串
+    """
+    config = {
+        "chunk_size": settings.CHUNK_SIZE,
+        "chunk_overlap": settings.CHUNK_OVERLAP,
+        "separators": TEXT_SEPARATORS,
+        "metadata_version": METADATA_VERSION,
+        "embedding_model": embedder_name()
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ManifestService:
+    """
+    文档索引清单服务
+    
+    清单记录每个文档的内容哈希、配置哈希和文本块ID，
+    增量同步时只重新索引新增或变化的文档，并删除已移除文档的向量。
+    
+    同一进程内的上传、同步和重建依次执行，避免重建替换清单时覆盖其他任务的记录；
+    其他进程（如入库脚本）在重建期间的修改，由重建在切换别名前的追平步骤补上。
+    """
+    
+    def __init__(self):
+        self.vector_service = chroma_service
+        self.processor = document_processor
+        self._lock = threading.RLock()
+    
+    def plan(self, db: Session, directory: str) -> Dict[str, Any]:
+        """
+        对比目录和清单，生成同步计划
+        
+        Args:
+            db: 数据库会话
+            directory: 文档目录
+        
+        Returns:
+            同步计划：added、changed（文件路径列表），removed、unchanged（来源列表），
+            content_hashes（文件路径到内容哈希的映射）
+        """
+        config_hash = chunking_config_hash()
+        entries = {entry.source: entry for entry in db.query(DocumentManifest).all()}
+        
+        plan = {
+            "added": [],
+            "changed": [],
+            "removed": [],
+            "unchanged": [],
+            "content_hashes": {}
+        }
+        seen = set()
+        
+        for file_path in self.processor.iter_files(directory):
+            source = self.processor.read_source(file_path)
+            seen.add(source)
+            content_hash = file_content_hash(file_path)
+            plan["content_hashes"][file_path] = content_hash
+            
+            entry = entries.get(source)
+            if entry is None:
+                plan["added"].append(file_path)
+            elif entry.content_hash != content_hash or entry.config_hash != config_hash:
+                plan["changed"].append(file_path)
+            else:
+                plan["unchanged"].append(source)
+        
+        plan["removed"] = [source for source in entries if source not in seen]
+        return plan
+    
+    def _record(
+        self,
+        db: Session,
+        document: Dict[str, Any],
+        content_hash: str,
+        collection_name: Optional[str] = None
+    ) -> None:
+        """
+        记录文档的清单；已索引过的文档删除新版本中不再存在的旧文本块
+        
+        Args:
+            db: 数据库会话
+            document: 流水线返回的文档信息（source、path、ids）
+            content_hash: 文件内容哈希
+            collection_name: 文档所在集合
+        """
+        entry = db.query(DocumentManifest).filter(
+            DocumentManifest.source == document["source"]
+        ).first()
+        
+        if entry is None:
+            entry = DocumentManifest(source=document["source"])
+            db.add(entry)
+        else:
+            stale_ids = set(entry.get_chunk_ids()) - set(document["ids"])
+            self.vector_service.delete_ids(list(stale_ids), collection_name=collection_name)
+        
+        entry.content_hash = content_hash
+        entry.config_hash = chunking_config_hash()
+        entry.set_chunk_ids(document["ids"])
+        db.commit()
+    
+    @staticmethod
+    def _with_total(
+        on_progress: Optional[Callable[[Dict[str, Any]], None]],
+        total: int
+    ) -> Optional[Callable[[Dict[str, Any]], None]]:
+        """为进度回调补充待处理的文档总数"""
+        if on_progress is None:
+            return None
+        return lambda stats: on_progress(dict(stats, documents_total=total))
+    
+    def index_files(
+        self,
+        db: Session,
+        file_paths: List[str],
+        content_hashes: Optional[Dict[str, str]] = None,
+        pipeline: Optional[IngestionPipeline] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        索引文件并更新清单；已索引过的文件在新文本块写入后删除旧文本块
+        
+        Args:
+            db: 数据库会话
+            file_paths: 文件路径列表
+            content_hashes: 已计算的内容哈希
+            pipeline: 入库流水线，默认新建
+            on_progress: 进度回调
+            
+        Returns:
+            流水线统计信息
+        """
+        content_hashes = dict(content_hashes or {})
+        pipeline = pipeline or IngestionPipeline()
+        
+        def on_document(document: Dict[str, Any]) -> None:
+            # 优先使用解析时计算的哈希，与写入的向量对应同一份文件内容
+            content_hash = (
+                document.get("content_hash")
+                or content_hashes.get(document["path"])
+                or file_content_hash(document["path"])
+            )
+            self._record(db, document, content_hash, collection_name=pipeline.collection_name)
+        
+        with self._lock:
+            return pipeline.run(
+                file_paths,
+                on_progress=self._with_total(on_progress, len(file_paths)),
+                on_document=on_document
+            )
+    
+    def rebuild(
+        self,
+        db: Session,
+        directory: str,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        全量重建：写入新的版本集合，完成后原子切换别名并清理旧版本，
+        重建期间读取方始终使用旧集合
+        
+        Args:
+            db: 数据库会话
+            directory: 文档目录
+            on_progress: 进度回调
+            
+        Returns:
+            流水线统计信息以及 collection（新集合）、removed_versions（已清理的旧集合）
+        """
+        with self._lock:
+            file_paths = list(self.processor.iter_files(directory))
+            target = self.vector_service.create_version()
+        
+            # 清单在切换后才替换，重建期间清单仍对应当前生效的集合
+            documents: Dict[str, Dict[str, Any]] = {}
+        
+            def on_document(document: Dict[str, Any]) -> None:
+                documents[document["source"]] = document
+        
+            try:
+                stats = IngestionPipeline(collection_name=target).run(
+                    file_paths,
+                    on_progress=self._with_total(on_progress, len(file_paths)),
+                    on_document=on_document
+                )
+                self._catch_up(directory, target, documents, stats)
+            except Exception:
+                self.vector_service.drop_version(target)
+                raise
+        
+            self.vector_service.switch_alias(target)
+            
+            self.reset(db)
+            for document in documents.values():
+                content_hash = document.get("content_hash") or file_content_hash(document["path"])
+                self._record(db, document, content_hash, collection_name=target)
+            
+            stats["collection"] = target
+            stats["removed_versions"] = self.vector_service.gc_versions()
+            return stats
+    
+    def _catch_up(
+        self,
+        directory: str,
+        target: str,
+        documents: Dict[str, Dict[str, Any]],
+        stats: Dict[str, Any]
+    ) -> None:
+        """
+        在切换别名前追平重建期间目录的变化（其他进程的上传、修改或删除），
+        新增或内容变化的文档重新写入新集合，已删除的文档从新集合中移除
+        
+        Args:
+            directory: 文档目录
+            target: 新集合名称
+            documents: 已写入新集合的文档（source到流水线文档信息的映射），原地更新
+            stats: 重建的流水线统计信息，原地累加
+        """
+        current = {self.processor.read_source(path): path for path in self.processor.iter_files(directory)}
+        
+        removed = [source for source in documents if source not in current]
+        if removed:
+            self.vector_service.delete_by_sources(removed, collection_name=target)
+            for source in removed:
+                documents.pop(source)
+        
+        stale = [
+            path for source, path in current.items()
+            if source not in documents or documents[source].get("content_hash") != file_content_hash(path)
+        ]
+        if not stale:
+            return
+        
+        def on_document(document: Dict[str, Any]) -> None:
+            previous = documents.get(document["source"])
+            if previous is not None:
+                stale_ids = set(previous["ids"]) - set(document["ids"])
+                self.vector_service.delete_ids(list(stale_ids), collection_name=target)
+            documents[document["source"]] = document
+        
+        caught_up = IngestionPipeline(collection_name=target).run(stale, on_document=on_document)
+        for key in ("documents_processed", "chunks_parsed", "total_chunks"):
+            stats[key] += caught_up[key]
+        stats["failures"].extend(caught_up["failures"])
+    
+    def remove(self, db: Session, sources: Iterable[str]) -> int:
+        """
+        删除文档的向量和清单记录，向量按元数据source过滤删除，
+        不在清单中的旧向量也会被一并清除；与同步和重建依次执行，
+        调用方应先删除文件，使进行中的重建在切换别名前不会重新写入该文档
+        
+        Args:
+            db: 数据库会话
+            sources: 来源列表
+            
+        Returns:
+            清单中记录的被删除文本块数量
+        """
+        sources = list(sources)
+        if not sources:
+            return 0
+        
+        with self._lock:
+            self.vector_service.delete_by_sources(sources)
+            
+            entries = db.query(DocumentManifest).filter(
+                DocumentManifest.source.in_(sources)
+            ).all()
+            
+            removed = 0
+            for entry in entries:
+                removed += entry.chunks_count
+                db.delete(entry)
+            db.commit()
+        
+        return removed
+    
+    def reset(self, db: Session) -> None:
+        """
+        清空清单
+        
+        Args:
+            db: 数据库会话
+        """
+        db.query(DocumentManifest).delete()
+        db.commit()
+    
+    def sync(
+        self,
+        db: Session,
+        directory: str,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        增量同步目录：只重新索引新增或变化的文档，删除已移除文档的向量
+        
+        Args:
+            db: 数据库会话
+            directory: 文档目录
+            on_progress: 进度回调
+        
+        Returns:
+            统计信息：流水线统计以及 added、changed、removed、unchanged 数量
+        """
+        with self._lock:
+            plan = self.plan(db, directory)
+        
+            removed_chunks = self.remove(db, plan["removed"])
+        
+            stats = self.index_files(
+                db,
+                plan["added"] + plan["changed"],
+                content_hashes=plan["content_hashes"],
+                on_progress=on_progress
+            )
+        
+        stats.update({
+            "added": len(plan["added"]),
+            "changed": len(plan["changed"]),
+            "removed": len(plan["removed"]),
+            "unchanged": len(plan["unchanged"]),
+            "removed_chunks": removed_chunks
+        })
+        return stats
+
+
+# 创建全局实例
+manifest_service = ManifestService()
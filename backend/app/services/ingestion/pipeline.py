@@ -0,0 +1,253 @@
+"""
+流式文档入库流水线模块
+"""
+import logging
+import queue
+import threading
+from typing import List, Dict, Iterable, Optional, Callable, Any
+from app.core.config import settings
+from app.services.rag.document_processor import document_processor
+from app.services.vector.chroma_service import chroma_service
+from app.services.vector.chunk_ids import make_chunk_id
+
+logger = logging.getLogger(__name__)
+
+# 阶段结束标记
+_DONE = object()
+
+
+class _StageError:
+    """上游阶段的异常，传递给下游后重新抛出"""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class IngestionPipeline:
+    """
+    流式文档入库流水线
+    
+    文件遍历 → 解析/分割（进程池）→ 批量编码 → 批量写入，
+    各阶段在独立线程中运行，之间使用有界队列连接，
+    峰值内存取决于批次大小和队列长度，而与语料规模无关。
+    """
+    
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        parse_workers: Optional[int] = None,
+        collection_name: Optional[str] = None
+    ):
+        """
+        Args:
+            batch_size: 每批编码和写入的文本块数量，默认使用 INGESTION_BATCH_SIZE
+            queue_size: 阶段之间队列的最大长度，默认使用 INGESTION_QUEUE_SIZE
+            parse_workers: 解析文档的进程数，默认使用 INGESTION_PARSE_WORKERS
+            collection_name: 写入的目标集合，为空时写入当前生效的集合
+        """
+        self.batch_size = max(1, batch_size or settings.INGESTION_BATCH_SIZE)
+        self.queue_size = max(1, queue_size or settings.INGESTION_QUEUE_SIZE)
+        self.parse_workers = parse_workers
+        self.collection_name = collection_name
+        self.vector_service = chroma_service
+        self.processor = document_processor
+    
+    def run(
+        self,
+        file_paths: Iterable[str],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_document: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        执行入库
+        
+        Args:
+            file_paths: 待入库的文件路径
+            on_progress: 进度回调，每写入一批后以当前统计信息调用
+            on_document: 文档回调，某个文档的全部文本块写入后以 {"source", "path", "ids", "content_hash"} 调用
+        
+        Returns:
+            统计信息：documents_processed、chunks_parsed、total_chunks、failures
+        """
+        stats = {
+            "documents_processed": 0,
+            "chunks_parsed": 0,
+            "total_chunks": 0,
+            "failures": []
+        }
+        stop = threading.Event()
+        document_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        batch_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        
+        parse_thread = threading.Thread(
+            target=self._parse_stage,
+            args=(file_paths, document_queue, stats, stop),
+            name="ingestion-parse",
+            daemon=True
+        )
+        embed_thread = threading.Thread(
+            target=self._embed_stage,
+            args=(document_queue, batch_queue, stop),
+            name="ingestion-embed",
+            daemon=True
+        )
+        parse_thread.start()
+        embed_thread.start()
+        
+        try:
+            self._write_stage(batch_queue, stats, on_progress, on_document)
+        finally:
+            # 写入阶段结束或失败时通知上游停止，避免阻塞在满队列上
+            stop.set()
+            embed_thread.join()
+            parse_thread.join()
+        
+        return stats
+    
+    def _put(self, target: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """放入队列，下游停止时放弃；返回是否成功放入"""
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _parse_stage(
+        self,
+        file_paths: Iterable[str],
+        output: queue.Queue,
+        stats: Dict[str, Any],
+        stop: threading.Event
+    ) -> None:
+        """解析阶段：并行解析和分割文档"""
+        results = self.processor.iter_documents(file_paths, workers=self.parse_workers)
+        try:
+            for result in results:
+                if stop.is_set():
+                    return
+                
+                if result["status"] != "succeeded":
+                    logger.warning("处理失败: %s - %s", result["source"], result["error"])
+                    stats["failures"].append({
+                        "source": result["source"],
+                        "path": result["path"],
+                        "error": result["error"]
+                    })
+                    continue
+                
+                stats["documents_processed"] += 1
+                stats["chunks_parsed"] += len(result["chunks"])
+                if not self._put(output, result, stop):
+                    return
+        except BaseException as e:
+            self._put(output, _StageError(e), stop)
+            return
+        finally:
+            # 提前结束时关闭生成器以释放进程池
+            results.close()
+        
+        self._put(output, _DONE, stop)
+    
+    def _embed_stage(
+        self,
+        source: queue.Queue,
+        output: queue.Queue,
+        stop: threading.Event
+    ) -> None:
+        """编码阶段：跨文档组成固定大小的批次，批内按长度分桶编码"""
+        documents: List[str] = []
+        metadatas: List[Dict] = []
+        ids: List[str] = []
+        # 最后一个文本块已进入当前批次的文档
+        completed: List[Dict[str, Any]] = []
+        
+        def flush() -> bool:
+            if not documents and not completed:
+                return True
+            batch = {
+                "documents": list(documents),
+                "metadatas": list(metadatas),
+                "ids": list(ids),
+                "embeddings": self.vector_service.embed_bulk(documents) if documents else [],
+                "completed": list(completed)
+            }
+            documents.clear()
+            metadatas.clear()
+            ids.clear()
+            completed.clear()
+            return self._put(output, batch, stop)
+        
+        try:
+            while not stop.is_set():
+                try:
+                    item = source.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    self._put(output, item, stop)
+                    return
+                
+                chunk_ids = item.get("ids") or [
+                    make_chunk_id(item["source"], i, chunk) for i, chunk in enumerate(item["chunks"])
+                ]
+                for chunk, metadata, chunk_id in zip(item["chunks"], item["metadatas"], chunk_ids):
+                    documents.append(chunk)
+                    metadatas.append(metadata)
+                    ids.append(chunk_id)
+                    if len(documents) >= self.batch_size and not flush():
+                        return
+                
+                completed.append({
+                    "source": item["source"],
+                    "path": item["path"],
+                    "ids": chunk_ids,
+                    "content_hash": item.get("content_hash")
+                })
+            else:
+                return
+            
+            if not flush():
+                return
+        except BaseException as e:
+            self._put(output, _StageError(e), stop)
+            return
+        
+        self._put(output, _DONE, stop)
+    
+    def _write_stage(
+        self,
+        source: queue.Queue,
+        stats: Dict[str, Any],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]],
+        on_document: Optional[Callable[[Dict[str, Any]], None]]
+    ) -> None:
+        """写入阶段：批量写入向量数据库"""
+        while True:
+            item = source.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            
+            if item["documents"]:
+                self.vector_service.add_embeddings(
+                    documents=item["documents"],
+                    embeddings=item["embeddings"],
+                    metadatas=item["metadatas"],
+                    ids=item["ids"],
+                    collection_name=self.collection_name
+                )
+                stats["total_chunks"] += len(item["documents"])
+            
+            if on_document is not None:
+                for document in item["completed"]:
+                    on_document(document)
+            
+            if on_progress is not None:
+                on_progress(stats)
@@ -1,8 +1,9 @@
 """
 Ollama LLM服务模块
 """
+import json
 import httpx
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, AsyncIterator
 from app.core.config import settings
 
 
@@ -12,7 +13,56 @@ class OllamaService:
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
-        self.timeout = settings.OLLAMA_TIMEOUT
+        self.timeout = httpx.Timeout(
+            connect=settings.OLLAMA_CONNECT_TIMEOUT,
+            read=settings.OLLAMA_TIMEOUT,
+            write=settings.OLLAMA_WRITE_TIMEOUT,
+            pool=settings.OLLAMA_POOL_TIMEOUT
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """
+        创建带连接池的HTTP客户端
+        
+        Returns:
+            httpx异步客户端
+        """
+        http2 = settings.OLLAMA_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                http2 = False
+        
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+            ),
+            http2=http2
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """获取共享客户端，未启动时按需创建（如在脚本中使用）"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+    
+    async def startup(self) -> None:
+        """创建共享客户端，在应用启动时调用"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+    
+    async def shutdown(self) -> None:
+        """关闭共享客户端，在应用关闭时调用"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def generate(
         self,
@@ -33,7 +83,7 @@ class OllamaService:
         Returns:
             生成的文本
         """
-        url = f"{self.base_url}/api/generate"
+        url = "/api/generate"
         
         payload = {
             "model": self.model,
@@ -48,11 +98,10 @@ class OllamaService:
         if system:
             payload["system"] = system
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            return result.get("response", "")
+        response = await self.client.post(url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        return result.get("response", "")
     
     async def chat(
         self,
@@ -71,7 +120,7 @@ class OllamaService:
         Returns:
             生成的回复
         """
-        url = f"{self.base_url}/api/chat"
+        url = "/api/chat"
         
         payload = {
             "model": self.model,
@@ -83,11 +132,106 @@ class OllamaService:
             }
         }
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(url, json=payload)
+        response = await self.client.post(url, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        return result.get("message", {}).get("content", "")
+    
+    async def _stream_lines(self, url: str, payload: Dict) -> AsyncIterator[Dict]:
+        """
+        以流式方式请求Ollama，逐行解析返回的JSON
+        
+        Args:
+            url: 请求地址
+            payload: 请求体
+            
+        Yields:
+            每一行解析后的JSON对象
+        """
+        async with self.client.stream("POST", url, json=payload) as response:
             response.raise_for_status()
-            result = response.json()
-            return result.get("message", {}).get("content", "")
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                yield data
+                if data.get("done"):
+                    break
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> AsyncIterator[str]:
+        """
+        流式生成文本
+        
+        Args:
+            prompt: 用户提示词
+            system: 系统提示词
+            temperature: 温度参数
+            max_tokens: 最大token数
+            
+        Yields:
+            逐个生成的文本片段
+        """
+        url = "/api/generate"
+        
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
+            }
+        }
+        
+        if system:
+            payload["system"] = system
+        
+        async for data in self._stream_lines(url, payload):
+            token = data.get("response", "")
+            if token:
+                yield token
+    
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> AsyncIterator[str]:
+        """
+        流式对话生成
+        
+        Args:
+            messages: 消息列表，格式为 [{"role": "user", "content": "..."}]
+            temperature: 温度参数
+            max_tokens: 最大token数
+            
+        Yields:
+            逐个生成的回复片段
+        """
+        url = "/api/chat"
+        
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens
+            }
+        }
+        
+        async for data in self._stream_lines(url, payload):
+            token = data.get("message", {}).get("content", "")
+            if token:
+                yield token
     
     async def health_check(self) -> bool:
         """
@@ -97,10 +241,8 @@ class OllamaService:
             服务是否正常
         """
         try:
-            url = f"{self.base_url}/api/tags"
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.get(url)
-                return response.status_code == 200
+            response = await self.client.get("/api/tags", timeout=10)
+            return response.status_code == 200
         except Exception:
             return False
 
@@ -0,0 +1,144 @@
+"""
+语义回答缓存模块
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    语义回答缓存
+    
+    通过查询向量的余弦相似度匹配历史问题，相似度超过阈值时直接返回缓存的回答。
+    条目绑定知识库版本，上传或重建知识库后旧条目自动失效；版本保存在向量存储中，
+    入库脚本或其他API进程的写入在下次刷新集合别名（CHROMA_ALIAS_REFRESH_SECONDS）后生效。
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        similarity_threshold: float,
+        ttl_seconds: float = 0
+    ):
+        """
+        Args:
+            max_entries: 最大缓存条目数，为0时禁用缓存
+            similarity_threshold: 命中所需的最小余弦相似度
+            ttl_seconds: 条目有效期（秒），为0时永不过期
+        """
+        self.max_entries = max(0, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.max_entries > 0
+    
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        """归一化向量"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _purge(self, version: str) -> None:
+        """删除其他版本或已过期的条目"""
+        now = time.monotonic()
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry["version"] != version
+            or (self.ttl_seconds and now - entry["created_at"] > self.ttl_seconds)
+        ]
+        for key in stale:
+            del self._entries[key]
+    
+    def get(self, embedding: np.ndarray, version: str) -> Optional[Dict[str, Any]]:
+        """
+        查找语义相似的缓存回答
+        
+        Args:
+            embedding: 查询向量
+            version: 知识库版本
+        
+        Returns:
+            缓存的结果字典，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        query = self._normalize(embedding)
+        with self._lock:
+            self._purge(version)
+            if not self._entries:
+                self.misses += 1
+                return None
+            
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+            
+            key = keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(self._entries[key]["result"], similarity=float(scores[best]))
+    
+    def put(self, embedding: np.ndarray, version: str, result: Dict[str, Any]) -> None:
+        """
+        写入回答
+        
+        Args:
+            embedding: 查询向量
+            version: 知识库版本
+            result: 回答结果（answer、sources、context）
+        """
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            self._entries[str(uuid.uuid4())] = {
+                "embedding": self._normalize(embedding),
+                "version": version,
+                "result": result,
+                "created_at": time.monotonic()
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """
+        获取缓存统计信息
+        
+        Returns:
+            包含命中、未命中等计数的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,195 @@
+"""
+上下文构建模块
+"""
+import math
+import re
+from typing import List, Dict, Optional, Any
+from app.core.config import settings
+from app.services.rag.fusion import hits_from_results
+
+_CJK_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿　-〿＀-￯]")
+
+# 判定相邻文本块存在重叠的最短公共长度（字符）
+MIN_OVERLAP_CHARS = 8
+
+# 近重复检测使用的字符 n-gram 长度
+SHINGLE_SIZE = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数：中文字符按每字1个token，其余非空白字符按每4个字符1个token
+    
+    Args:
+        text: 文本
+    
+    Returns:
+        估算的token数
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    other = len(re.sub(r"\s", "", text)) - cjk
+    return cjk + math.ceil(other / 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    按估算的token数截断文本
+    
+    Args:
+        text: 文本
+        max_tokens: 最大token数
+    
+    Returns:
+        截断后的文本
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def merge_overlapping(first: str, second: str, max_overlap: Optional[int] = None) -> str:
+    """
+    合并相邻的两个文本块，去掉分块时重复的重叠部分
+    
+    Args:
+        first: 前一个文本块
+        second: 后一个文本块
+        max_overlap: 最大重叠长度，默认为 CHUNK_OVERLAP 的两倍
+    
+    Returns:
+        合并后的文本
+    """
+    if max_overlap is None:
+        max_overlap = settings.CHUNK_OVERLAP * 2
+    
+    for size in range(min(len(first), len(second), max_overlap), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + "\n" + second
+
+
+def _shingles(text: str) -> set:
+    """文本的字符 n-gram 集合"""
+    text = re.sub(r"\s+", "", text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    """两个集合的Jaccard相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _merge_adjacent(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将同一来源中序号连续的文本块合并为段落，段落的排名取其中最相关文本块的排名
+    
+    Args:
+        hits: 按相关度降序排列的命中列表
+    
+    Returns:
+        按相关度降序排列的段落列表
+    """
+    by_source: Dict[str, List[Dict[str, Any]]] = {}
+    passages = []
+    
+    for rank, hit in enumerate(hits):
+        metadata = hit["metadata"] or {}
+        item = dict(hit, rank=rank)
+        if metadata.get("chunk_index") is None:
+            passages.append({"source": metadata.get("source", "未知来源"), "rank": rank, "chunks": [item]})
+        else:
+            by_source.setdefault(metadata.get("source", "未知来源"), []).append(item)
+    
+    for source, items in by_source.items():
+        items.sort(key=lambda item: item["metadata"]["chunk_index"])
+        run = []
+        for item in items:
+            index = item["metadata"]["chunk_index"]
+            if run and index == run[-1]["metadata"]["chunk_index"]:
+                continue
+            if run and index != run[-1]["metadata"]["chunk_index"] + 1:
+                passages.append({"source": source, "rank": min(i["rank"] for i in run), "chunks": run})
+                run = []
+            run.append(item)
+        if run:
+            passages.append({"source": source, "rank": min(i["rank"] for i in run), "chunks": run})
+    
+    for passage in passages:
+        text = passage["chunks"][0]["document"]
+        for item in passage["chunks"][1:]:
+            text = merge_overlapping(text, item["document"])
+        passage["text"] = text
+    
+    passages.sort(key=lambda passage: passage["rank"])
+    return passages
+
+
+def build_context(
+    search_results: Dict,
+    max_tokens: Optional[int] = None,
+    dedup_threshold: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    在token预算内构建上下文
+    
+    同一来源的相邻文本块合并并去除重叠部分，与已选段落高度相似的段落被丢弃，
+    其余段落按相关度依次放入，直到达到token预算。
+    
+    Args:
+        search_results: 检索结果（ChromaDB格式，按相关度降序）
+        max_tokens: token预算，默认使用 CONTEXT_MAX_TOKENS，为0时不限制
+        dedup_threshold: 近重复判定的Jaccard相似度阈值，默认使用 CONTEXT_DEDUP_THRESHOLD
+    
+    Returns:
+        包含上下文文本（context）、实际使用的来源（sources）和估算token数（tokens）的字典
+    """
+    if max_tokens is None:
+        max_tokens = settings.CONTEXT_MAX_TOKENS
+    if dedup_threshold is None:
+        dedup_threshold = settings.CONTEXT_DEDUP_THRESHOLD
+    
+    parts = []
+    sources = []
+    selected_shingles = []
+    used_tokens = 0
+    
+    for passage in _merge_adjacent(hits_from_results(search_results)):
+        shingles = _shingles(passage["text"])
+        if any(_jaccard(shingles, other) >= dedup_threshold for other in selected_shingles):
+            continue
+        
+        header = f"[参考资料 {len(parts) + 1}] (来源: {passage['source']})\n"
+        text = passage["text"]
+        tokens = estimate_tokens(header) + estimate_tokens(text)
+        
+        if max_tokens and used_tokens + tokens > max_tokens:
+            remaining = max_tokens - used_tokens - estimate_tokens(header)
+            # 预算所剩无几时不再放入截断的段落
+            if remaining < min(settings.CHUNK_SIZE, max_tokens) // 4:
+                continue
+            text = truncate_to_tokens(text, remaining)
+            tokens = estimate_tokens(header) + estimate_tokens(text)
+        
+        parts.append(f"{header}{text}\n")
+        selected_shingles.append(shingles)
+        used_tokens += tokens
+        if passage["source"] not in sources:
+            sources.append(passage["source"])
+    
+    return {
+        "context": "\n".join(parts),
+        "sources": sources,
+        "tokens": used_tokens
+    }
@@ -2,12 +2,52 @@
 文档处理模块
 """
 import os
-from typing import List, Dict
+import re
+import bisect
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Dict, Iterator, Iterable, Optional
 from pathlib import Path
 from pypdf import PdfReader
 from docx import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from app.core.config import settings
+from app.services.vector.chunk_ids import make_chunk_id
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.doc', '.txt']
+
+TEXT_SEPARATORS = ["\n\n", "\n", "。", "！", "？", "；", " ", ""]
+
+# 文本块元数据的版本，新增或修改元数据字段时递增，使增量同步重新索引所有文档
+METADATA_VERSION = 4
+
+# 施行日期，如"自2008年1月1日起施行"、"施行日期：2008年1月1日"
+EFFECTIVE_DATE_PATTERNS = [
+    re.compile(r"自\s*(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日\s*起\s*(?:施行|实施|生效)"),
+    re.compile(r"(?:施行|实施|生效)日期\s*[:：]?\s*(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日"),
+    re.compile(r"(\d{4})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日\s*起\s*(?:施行|实施|生效)")
+]
+
+
+def file_content_hash(file_path: str) -> str:
+    """
+    计算文件内容哈希
+    
+    Args:
+        file_path: 文件路径
+    
+    Returns:
+        SHA-256十六进制字符串
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 class DocumentProcessor:
@@ -17,9 +57,23 @@ class DocumentProcessor:
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.CHUNK_SIZE,
             chunk_overlap=settings.CHUNK_OVERLAP,
-            separators=["\n\n", "\n", "。", "！", "？", "；", " ", ""]
+            separators=TEXT_SEPARATORS,
+            add_start_index=True
         )
     
+    def read_pdf_pages(self, file_path: str) -> List[str]:
+        """
+        按页读取PDF文件
+        
+        Args:
+            file_path: PDF文件路径
+            
+        Returns:
+            每页的文本内容
+        """
+        reader = PdfReader(file_path)
+        return [page.extract_text() + "\n" for page in reader.pages]
+    
     def read_pdf(self, file_path: str) -> str:
         """
         读取PDF文件
@@ -30,11 +84,80 @@ class DocumentProcessor:
         Returns:
             文本内容
         """
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return "".join(self.read_pdf_pages(file_path))
+    
+    def read_title(self, file_path: str) -> str:
+        """
+        读取文档标题，优先使用文件属性中的标题，否则使用文件名
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            文档标题
+        """
+        ext = Path(file_path).suffix.lower()
+        title = None
+        try:
+            if ext == '.pdf':
+                title = (PdfReader(file_path).metadata or {}).get("/Title")
+            elif ext in ['.docx', '.doc']:
+                title = Document(file_path).core_properties.title
+        except Exception:
+            title = None
+        
+        title = str(title).strip() if title else ""
+        return title or Path(file_path).stem
+    
+    def read_category(self, file_path: str) -> Optional[str]:
+        """
+        根据文件在文档目录中的子目录确定分类，位于文档目录根下的文件没有分类
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            分类名称
+        """
+        try:
+            relative = Path(file_path).resolve().parent.relative_to(Path(settings.DOCUMENTS_DIR).resolve())
+        except ValueError:
+            return None
+        return relative.as_posix() if relative.parts else None
+    
+    def read_source(self, file_path: str) -> str:
+        """
+        文档来源：相对文档目录的POSIX路径，用作清单、文本块ID和按来源删除的键，
+        不同分类中的同名文件互不冲突；不在文档目录中的文件使用文件名
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            来源
+        """
+        try:
+            return Path(file_path).resolve().relative_to(Path(settings.DOCUMENTS_DIR).resolve()).as_posix()
+        except ValueError:
+            return Path(file_path).name
+    
+    def extract_effective_date(self, text: str) -> Optional[str]:
+        """
+        从正文中提取施行日期
+        
+        Args:
+            text: 文本内容
+            
+        Returns:
+            YYYY-MM-DD格式的日期，未找到时返回None
+        """
+        for pattern in EFFECTIVE_DATE_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                year, month, day = (int(value) for value in match.groups())
+                if 1 <= month <= 12 and 1 <= day <= 31:
+                    return f"{year:04d}-{month:02d}-{day:02d}"
+        return None
     
     def read_docx(self, file_path: str) -> str:
         """
@@ -98,6 +221,21 @@ class DocumentProcessor:
         """
         return self.text_splitter.split_text(text)
     
+    def split_text_with_offsets(self, text: str) -> List[Dict]:
+        """
+        分割文本并返回每个文本块在原文中的起始位置
+        
+        Args:
+            text: 文本内容
+            
+        Returns:
+            文本块列表，每项包含 text 和 start_index
+        """
+        return [
+            {"text": doc.page_content, "start_index": doc.metadata.get("start_index", -1)}
+            for doc in self.text_splitter.create_documents([text])
+        ]
+    
     def process_document(self, file_path: str) -> Dict:
         """
         处理文档
@@ -108,58 +246,208 @@ class DocumentProcessor:
         Returns:
             包含文本块和元数据的字典
         """
-        # 读取文件
-        text = self.read_file(file_path)
+        # 读取文件，PDF记录每页在全文中的起始位置用于定位页码
+        page_offsets = None
+        if Path(file_path).suffix.lower() == '.pdf':
+            pages = self.read_pdf_pages(file_path)
+            page_offsets = []
+            offset = 0
+            for page in pages:
+                page_offsets.append(offset)
+                offset += len(page)
+            text = "".join(pages)
+        else:
+            text = self.read_file(file_path)
         
         # 分割文本
-        chunks = self.split_text(text)
-        
-        # 生成元数据
-        file_name = Path(file_path).name
-        metadatas = [
-            {
-                "source": file_name,
-                "chunk_index": i,
-                "total_chunks": len(chunks)
-            }
-            for i in range(len(chunks))
-        ]
+        splits = self.split_text_with_offsets(text)
+        chunks = [split["text"] for split in splits]
+        
+        # 生成元数据（ChromaDB元数据不支持空值，缺失的字段不写入；
+        # 未识别出施行日期时 effective_date_int 记为0，使"只检索已施行"的过滤仍能匹配）
+        source = self.read_source(file_path)
+        document_metadata = {
+            "source": source,
+            "file_name": Path(file_path).name,
+            "title": self.read_title(file_path)
+        }
+        
+        category = self.read_category(file_path)
+        if category:
+            document_metadata["category"] = category
+        
+        effective_date = self.extract_effective_date(text)
+        if effective_date:
+            document_metadata["effective_date"] = effective_date
+            document_metadata["effective_date_int"] = int(effective_date.replace("-", ""))
+        else:
+            document_metadata["effective_date_int"] = 0
+        
+        metadatas = []
+        for i, split in enumerate(splits):
+            metadata = dict(document_metadata, chunk_index=i, total_chunks=len(chunks))
+            if page_offsets and split["start_index"] >= 0:
+                metadata["page"] = bisect.bisect_right(page_offsets, split["start_index"])
+            metadatas.append(metadata)
+        
+        # 生成确定性的文本块ID
+        ids = [make_chunk_id(source, i, chunk) for i, chunk in enumerate(chunks)]
         
         return {
             "chunks": chunks,
             "metadatas": metadatas,
-            "source": file_name
+            "ids": ids,
+            "source": source
         }
     
-    def process_directory(self, directory: str) -> List[Dict]:
+    def iter_files(self, directory: str) -> Iterator[str]:
+        """
+        遍历目录中支持的文档文件
+        
+        Args:
+            directory: 目录路径
+            
+        Yields:
+            文件路径
+        """
+        for root, _, files in os.walk(directory):
+            for file in sorted(files):
+                if Path(file).suffix.lower() in SUPPORTED_EXTENSIONS:
+                    yield os.path.join(root, file)
+    
+    def iter_documents(
+        self,
+        file_paths: Iterable[str],
+        workers: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        使用进程池并行解析和分割文档，按完成顺序逐个返回结果
+        
+        Args:
+            file_paths: 文件路径
+            workers: 进程数，默认使用 INGESTION_PARSE_WORKERS，为1时在当前进程中顺序处理
+            
+        Yields:
+            处理结果。成功时 status 为 "succeeded"，包含 chunks、metadatas、source、path、content_hash；
+            失败时 status 为 "failed"，包含 source、path、error
+        """
+        if workers is None:
+            workers = settings.INGESTION_PARSE_WORKERS or os.cpu_count() or 1
+        
+        if workers <= 1:
+            for file_path in file_paths:
+                yield _process_file(file_path)
+            return
+        
+        # 使用spawn启动子进程，避免fork已加载模型和线程池的父进程
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            pending: Dict[Future, str] = {}
+            paths = iter(file_paths)
+            
+            # 限制同时提交的文件数，使已完成但未消费的结果不会无限堆积
+            for file_path in paths:
+                pending[executor.submit(_process_file, file_path)] = file_path
+                if len(pending) >= workers * 2:
+                    break
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        # 子进程异常退出等情况
+                        yield _failure(file_path, e)
+                    
+                    next_path = next(paths, None)
+                    if next_path is not None:
+                        pending[executor.submit(_process_file, next_path)] = next_path
+    
+    def iter_directory(
+        self,
+        directory: str,
+        workers: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        并行处理目录中的所有文档，按完成顺序逐个返回结果
+        
+        Args:
+            directory: 目录路径
+            workers: 进程数
+            
+        Yields:
+            处理结果，格式同 iter_documents
+        """
+        return self.iter_documents(self.iter_files(directory), workers=workers)
+    
+    def process_directory(self, directory: str, workers: Optional[int] = None) -> List[Dict]:
         """
         处理目录中的所有文档
         
         Args:
             directory: 目录路径
+            workers: 进程数
             
         Returns:
-            处理结果列表
+            处理成功的结果列表
         """
         results = []
-        supported_extensions = ['.pdf', '.docx', '.doc', '.txt']
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                ext = Path(file_path).suffix.lower()
-                
-                if ext in supported_extensions:
-                    try:
-                        result = self.process_document(file_path)
-                        results.append(result)
-                        print(f"✓ 处理成功: {file}")
-                    except Exception as e:
-                        print(f"✗ 处理失败: {file} - {str(e)}")
+        for result in self.iter_directory(directory, workers=workers):
+            if result["status"] == "succeeded":
+                results.append(result)
+                logger.info("处理成功: %s", result["source"])
+            else:
+                logger.warning("处理失败: %s - %s", result["source"], result["error"])
         
         return results
 
 
+def _failure(file_path: str, error: Exception) -> Dict:
+    """
+    构建处理失败的结果
+    
+    Args:
+        file_path: 文件路径
+        error: 异常
+        
+    Returns:
+        失败结果字典
+    """
+    return {
+        "status": "failed",
+        "source": document_processor.read_source(file_path),
+        "path": file_path,
+        "error": f"{type(error).__name__}: {error}"
+    }
+
+
+def _process_file(file_path: str) -> Dict:
+    """
+    处理单个文档（可在子进程中执行）
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        处理结果
+    """
+    try:
+        # 在解析前计算内容哈希：解析期间文件被修改时，记录的是旧内容的哈希，
+        # 下次增量同步会发现不一致并重新索引，而不会把新哈希记在旧内容的向量上
+        content_hash = file_content_hash(file_path)
+        result = document_processor.process_document(file_path)
+    except Exception as e:
+        return _failure(file_path, e)
+    
+    result["status"] = "succeeded"
+    result["path"] = file_path
+    result["content_hash"] = content_hash
+    return result
+
+
 # 创建全局实例
 document_processor = DocumentProcessor()
 
@@ -0,0 +1,142 @@
+"""
+检索结果融合模块
+"""
+from typing import List, Dict, Optional, Any
+
+
+def hits_from_results(results: Dict) -> List[Dict[str, Any]]:
+    """
+    将ChromaDB格式的查询结果转换为命中列表
+    
+    Args:
+        results: 查询结果（ids、documents、metadatas、distances均为二维列表）
+    
+    Returns:
+        命中列表，按原顺序排列
+    """
+    ids = (results.get("ids") or [[]])[0]
+    documents = (results.get("documents") or [[]])[0]
+    metadatas = (results.get("metadatas") or [[]])[0] or [None] * len(ids)
+    distances = (results.get("distances") or [[]])[0] or [None] * len(ids)
+    
+    return [
+        {"id": chunk_id, "document": document, "metadata": metadata, "distance": distance}
+        for chunk_id, document, metadata, distance in zip(ids, documents, metadatas, distances)
+    ]
+
+
+def hits_to_results(hits: List[Dict[str, Any]]) -> Dict:
+    """
+    将命中列表转换回ChromaDB格式的查询结果
+    
+    Args:
+        hits: 命中列表
+    
+    Returns:
+        查询结果，distances为融合后的得分取负（越小越相关）
+    """
+    return {
+        "ids": [[hit["id"] for hit in hits]],
+        "documents": [[hit["document"] for hit in hits]],
+        "metadatas": [[hit["metadata"] for hit in hits]],
+        "distances": [[-hit["score"] for hit in hits]]
+    }
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    top_k: int,
+    k: int = 60,
+    weights: Optional[List[float]] = None
+) -> List[Dict[str, Any]]:
+    """
+    倒数排名融合（RRF）：score = Σ weight / (k + rank)
+    
+    Args:
+        result_lists: 各检索器的命中列表，按相关度降序
+        top_k: 返回结果数量
+        k: 平滑常数
+        weights: 各检索器的权重
+    
+    Returns:
+        融合后的命中列表
+    """
+    weights = weights or [1.0] * len(result_lists)
+    fused: Dict[str, Dict[str, Any]] = {}
+    
+    for hits, weight in zip(result_lists, weights):
+        for rank, hit in enumerate(hits, 1):
+            entry = fused.setdefault(hit["id"], dict(hit, score=0.0))
+            entry["score"] += weight / (k + rank)
+    
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)[:top_k]
+
+
+def weighted_score_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    top_k: int,
+    weights: Optional[List[float]] = None
+) -> List[Dict[str, Any]]:
+    """
+    加权得分融合：各检索器的距离经最小-最大归一化为相关度后加权求和
+    
+    Args:
+        result_lists: 各检索器的命中列表，distance越小越相关
+        top_k: 返回结果数量
+        weights: 各检索器的权重
+    
+    Returns:
+        融合后的命中列表
+    """
+    weights = weights or [1.0] * len(result_lists)
+    fused: Dict[str, Dict[str, Any]] = {}
+    
+    for hits, weight in zip(result_lists, weights):
+        distances = [hit["distance"] for hit in hits if hit["distance"] is not None]
+        if not distances:
+            continue
+        low, high = min(distances), max(distances)
+        
+        for hit in hits:
+            if hit["distance"] is None:
+                continue
+            relevance = 1.0 if high == low else (high - hit["distance"]) / (high - low)
+            entry = fused.setdefault(hit["id"], dict(hit, score=0.0))
+            entry["score"] += weight * relevance
+    
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)[:top_k]
+
+
+def fuse_results(
+    vector_results: Dict,
+    keyword_results: Dict,
+    top_k: int,
+    strategy: str = "rrf",
+    vector_weight: float = 0.5,
+    rrf_k: int = 60
+) -> Dict:
+    """
+    融合向量检索和关键词检索的结果
+    
+    Args:
+        vector_results: 向量检索结果
+        keyword_results: 关键词检索结果
+        top_k: 返回结果数量
+        strategy: 融合策略，rrf 或 weighted
+        vector_weight: 向量检索的权重（关键词检索权重为 1 - vector_weight）
+        rrf_k: RRF平滑常数
+    
+    Returns:
+        ChromaDB格式的融合结果
+    """
+    result_lists = [hits_from_results(vector_results), hits_from_results(keyword_results)]
+    weights = [vector_weight, 1.0 - vector_weight]
+    
+    if strategy == "weighted":
+        hits = weighted_score_fusion(result_lists, top_k, weights=weights)
+    elif strategy == "rrf":
+        hits = reciprocal_rank_fusion(result_lists, top_k, k=rrf_k, weights=weights)
+    else:
+        raise ValueError(f"不支持的融合策略: {strategy}")
+    
+    return hits_to_results(hits)
@@ -1,9 +1,16 @@
 """
 RAG (检索增强生成) 服务模块
 """
-from typing import List, Dict, Optional
+import asyncio
+import numpy as np
+from typing import List, Dict, Optional, AsyncIterator, Any
 from app.services.llm.ollama_service import ollama_service
 from app.services.vector.chroma_service import chroma_service
+from app.services.rag.answer_cache import SemanticAnswerCache
+from app.services.rag.fusion import fuse_results
+from app.services.rag.context_builder import build_context
+from app.services.rag.reranker import reranker
+from app.services.vector.filters import filters_key
 from app.core.config import settings
 
 
@@ -13,29 +20,24 @@ class RAGService:
     def __init__(self):
         self.llm_service = ollama_service
         self.vector_service = chroma_service
+        self.reranker = reranker
+        self.answer_cache = SemanticAnswerCache(
+            max_entries=settings.ANSWER_CACHE_SIZE,
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=settings.ANSWER_CACHE_TTL
+        )
     
-    def _build_context(self, search_results: Dict) -> str:
+    def _build_context(self, search_results: Dict) -> Dict[str, any]:
         """
-        构建上下文
+        构建上下文：合并相邻文本块、去除近重复内容，并按相关度填充到token预算内
         
         Args:
             search_results: 向量搜索结果
             
         Returns:
-            格式化的上下文字符串
+            包含格式化的上下文字符串（context）和实际使用的来源（sources）的字典
         """
-        documents = search_results.get("documents", [[]])[0]
-        metadatas = search_results.get("metadatas", [[]])[0]
-        
-        if not documents:
-            return ""
-        
-        context_parts = []
-        for i, (doc, metadata) in enumerate(zip(documents, metadatas), 1):
-            source = metadata.get("source", "未知来源") if metadata else "未知来源"
-            context_parts.append(f"[参考资料 {i}] (来源: {source})\n{doc}\n")
-        
-        return "\n".join(context_parts)
+        return build_context(search_results)
     
     def _build_prompt(self, query: str, context: str) -> str:
         """
@@ -77,11 +79,112 @@ class RAGService:
         
         return prompt
     
+    @property
+    def hybrid_enabled(self) -> bool:
+        """是否使用混合检索"""
+        return settings.RETRIEVAL_MODE == "hybrid" and self.vector_service.keyword_index is not None
+    
+    async def _search(
+        self,
+        question: str,
+        query_embedding: np.ndarray,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        检索相关文档；混合检索时并发执行向量检索和关键词检索，再融合排序；
+        启用重排序时先多取候选，再由交叉编码器保留最相关的 top_k 条
+        
+        Args:
+            question: 用户问题
+            query_embedding: 问题的查询向量
+            top_k: 检索文档数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            搜索结果
+        """
+        top_k = top_k or settings.TOP_K
+        limit = max(top_k, settings.RERANK_CANDIDATES) if settings.RERANK_ENABLED else top_k
+        
+        if not self.hybrid_enabled:
+            search_results = await self.vector_service.asearch_by_embedding(
+                query_embedding, top_k=limit, filters=filters
+            )
+        else:
+            candidates = limit * max(1, settings.HYBRID_CANDIDATE_MULTIPLIER)
+            vector_results, keyword_results = await asyncio.gather(
+                self.vector_service.asearch_by_embedding(query_embedding, top_k=candidates, filters=filters),
+                self.vector_service.akeyword_search(question, top_k=candidates, filters=filters)
+            )
+            search_results = fuse_results(
+                vector_results,
+                keyword_results,
+                limit,
+                strategy=settings.FUSION_STRATEGY,
+                vector_weight=settings.HYBRID_VECTOR_WEIGHT,
+                rrf_k=settings.RRF_K
+            )
+        
+        if settings.RERANK_ENABLED:
+            search_results = await self.reranker.arerank(question, search_results, top_k)
+        
+        return search_results
+    
+    async def _retrieve(
+        self,
+        question: str,
+        query_embedding: np.ndarray,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, any]:
+        """
+        检索相关文档并构建提示词
+        
+        Args:
+            question: 用户问题
+            query_embedding: 问题的查询向量
+            top_k: 检索文档数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            包含提示词、来源和上下文的字典
+        """
+        # 检索相关文档
+        search_results = await self._search(question, query_embedding, top_k=top_k, filters=filters)
+        
+        # 构建上下文
+        built = self._build_context(search_results)
+        
+        return {
+            "prompt": self._build_prompt(question, built["context"]),
+            "sources": built["sources"],
+            "context": built["context"]
+        }
+    
+    async def _cache_version(self, top_k: int = None, filters: Optional[Dict[str, Any]] = None) -> str:
+        """
+        回答缓存的版本键，知识库变化或检索参数、过滤条件不同时不复用缓存；
+        知识库版本可能需要访问向量存储刷新，不在事件循环中同步读取
+        
+        Args:
+            top_k: 检索文档数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            版本键
+        """
+        mode = "hybrid" if self.hybrid_enabled else "vector"
+        rerank = settings.RERANKER_MODEL if settings.RERANK_ENABLED else "none"
+        collection_version = await self.vector_service.acollection_version()
+        return f"{collection_version}:{top_k or settings.TOP_K}:{mode}:{rerank}:{filters_key(filters)}"
+    
     async def query(
         self,
         question: str,
         conversation_history: Optional[List[Dict[str, str]]] = None,
-        top_k: int = None
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict[str, any]:
         """
         执行RAG查询
@@ -90,45 +193,88 @@ class RAGService:
             question: 用户问题
             conversation_history: 对话历史
             top_k: 检索文档数量
+            filters: 元数据过滤条件（sources、categories、effective_from、effective_to、in_force）
             
         Returns:
             包含回答和来源的字典
         """
-        # 检索相关文档
-        search_results = self.vector_service.search(question, top_k=top_k)
+        query_embedding = await self.vector_service.aembed_query(question)
+        version = await self._cache_version(top_k, filters)
         
-        # 构建上下文
-        context = self._build_context(search_results)
+        # 语义相似的问题已回答过时直接返回缓存
+        cached = self.answer_cache.get(query_embedding, version)
+        if cached is not None:
+            return cached
         
-        # 构建提示词
-        prompt = self._build_prompt(question, context)
+        retrieval = await self._retrieve(question, query_embedding, top_k=top_k, filters=filters)
         
         # 生成回答
         answer = await self.llm_service.generate(
-            prompt=prompt,
+            prompt=retrieval["prompt"],
             temperature=0.7,
             max_tokens=2048
         )
         
-        # 提取来源信息
-        sources = []
-        metadatas = search_results.get("metadatas", [[]])[0]
-        for metadata in metadatas:
-            if metadata:
-                source = metadata.get("source", "")
-                if source and source not in sources:
-                    sources.append(source)
-        
-        return {
+        result = {
             "answer": answer,
-            "sources": sources,
-            "context": context
+            "sources": retrieval["sources"],
+            "context": retrieval["context"]
         }
+        self.answer_cache.put(query_embedding, version, result)
+        
+        return result
+    
+    async def query_stream(
+        self,
+        question: str,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, any]]:
+        """
+        流式执行RAG查询，先返回来源，再逐个返回生成的文本片段
+        
+        Args:
+            question: 用户问题
+            top_k: 检索文档数量
+            filters: 元数据过滤条件
+            
+        Yields:
+            事件字典，{"type": "sources", "sources": [...]} 或 {"type": "token", "content": "..."}
+        """
+        query_embedding = await self.vector_service.aembed_query(question)
+        version = await self._cache_version(top_k, filters)
+        
+        cached = self.answer_cache.get(query_embedding, version)
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"]}
+            yield {"type": "token", "content": cached["answer"]}
+            return
+        
+        retrieval = await self._retrieve(question, query_embedding, top_k=top_k, filters=filters)
+        
+        yield {"type": "sources", "sources": retrieval["sources"]}
+        
+        parts = []
+        async for token in self.llm_service.generate_stream(
+            prompt=retrieval["prompt"],
+            temperature=0.7,
+            max_tokens=2048
+        ):
+            parts.append(token)
+            yield {"type": "token", "content": token}
+        
+        # 仅缓存完整生成的回答
+        self.answer_cache.put(query_embedding, version, {
+            "answer": "".join(parts),
+            "sources": retrieval["sources"],
+            "context": retrieval["context"]
+        })
     
     async def chat(
         self,
         messages: List[Dict[str, str]],
-        use_rag: bool = True
+        use_rag: bool = True,
+        filters: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         对话接口
@@ -136,6 +282,7 @@ class RAGService:
         Args:
             messages: 消息历史
             use_rag: 是否使用RAG
+            filters: 元数据过滤条件
             
         Returns:
             助手回复
@@ -155,8 +302,42 @@ class RAGService:
             return await self.llm_service.chat(messages)
         
         # 使用RAG
-        result = await self.query(last_user_message)
+        result = await self.query(last_user_message, filters=filters)
         return result["answer"]
+    
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        use_rag: bool = True,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, any]]:
+        """
+        流式对话接口
+        
+        Args:
+            messages: 消息历史
+            use_rag: 是否使用RAG
+            filters: 元数据过滤条件
+            
+        Yields:
+            事件字典，格式同 query_stream
+        """
+        last_user_message = None
+        if use_rag:
+            for msg in reversed(messages):
+                if msg.get("role") == "user":
+                    last_user_message = msg.get("content")
+                    break
+        
+        if not last_user_message:
+            # 不使用RAG，直接调用LLM
+            yield {"type": "sources", "sources": []}
+            async for token in self.llm_service.chat_stream(messages):
+                yield {"type": "token", "content": token}
+            return
+        
+        async for event in self.query_stream(last_user_message, filters=filters):
+            yield event
 
 
 # 创建全局实例
@@ -0,0 +1,133 @@
+"""
+交叉编码器重排序模块
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from app.core.config import settings
+
+
+class Reranker:
+    """
+    交叉编码器重排序器
+    
+    对检索得到的候选文本块逐一与问题拼接打分，只保留得分最高的结果，
+    精度高于向量相似度，可以用更少的参考资料得到同样的回答质量，缩短提示词。
+    模型在首次使用时加载，候选按批次在线程池中打分。
+    """
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None
+    ):
+        """
+        Args:
+            model_name: 交叉编码器模型名称，默认使用 RERANKER_MODEL
+            device: 运行设备，默认使用 RERANKER_DEVICE
+            batch_size: 每批打分的候选数量，默认使用 RERANK_BATCH_SIZE
+            workers: 打分线程数，默认使用 RERANK_WORKERS
+        """
+        self.model_name = model_name or settings.RERANKER_MODEL
+        self.device = device or settings.RERANKER_DEVICE
+        self.batch_size = max(1, batch_size or settings.RERANK_BATCH_SIZE)
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers or settings.RERANK_WORKERS),
+            thread_name_prefix="rerank"
+        )
+    
+    @property
+    def model(self):
+        """交叉编码器模型，首次访问时加载"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # 延迟导入，sentence_transformers会同时导入torch
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device=self.device)
+        return self._model
+    
+    def warmup(self) -> None:
+        """预热：加载模型并完成一次打分"""
+        self.score("预热", ["预热"])
+    
+    def score(self, query: str, documents: List[str]) -> List[float]:
+        """
+        计算问题与文本的相关度得分
+        
+        Args:
+            query: 问题
+            documents: 文本列表
+        
+        Returns:
+            得分列表，越大越相关
+        """
+        if not documents:
+            return []
+        scores = self.model.predict(
+            [(query, document) for document in documents],
+            batch_size=self.batch_size,
+            show_progress_bar=False
+        )
+        return [float(score) for score in scores]
+    
+    async def ascore(self, query: str, documents: List[str]) -> List[float]:
+        """
+        异步计算相关度得分，候选按批次分发到线程池并行打分
+        
+        Args:
+            query: 问题
+            documents: 文本列表
+        
+        Returns:
+            得分列表，越大越相关
+        """
+        loop = asyncio.get_running_loop()
+        batches = [
+            documents[start:start + self.batch_size]
+            for start in range(0, len(documents), self.batch_size)
+        ]
+        results = await asyncio.gather(*[
+            loop.run_in_executor(self._executor, self.score, query, batch)
+            for batch in batches
+        ])
+        return [score for batch_scores in results for score in batch_scores]
+    
+    async def arerank(self, query: str, search_results: Dict, top_k: int) -> Dict:
+        """
+        异步重排序检索结果
+        
+        Args:
+            query: 问题
+            search_results: 检索结果（ChromaDB格式）
+            top_k: 保留的结果数量
+        
+        Returns:
+            重排序后的检索结果，distances为得分取负（越小越相关）
+        """
+        ids = (search_results.get("ids") or [[]])[0]
+        documents = (search_results.get("documents") or [[]])[0]
+        metadatas = (search_results.get("metadatas") or [[]])[0] or [None] * len(ids)
+        
+        scores = await self.ascore(query, documents)
+        ranked = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:top_k]
+        
+        return {
+            "ids": [[ids[i] for i in ranked]],
+            "documents": [[documents[i] for i in ranked]],
+            "metadatas": [[metadatas[i] for i in ranked]],
+            "distances": [[-scores[i] for i in ranked]]
+        }
+    
+    def shutdown(self) -> None:
+        """关闭打分线程池"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 创建全局实例
+reranker = Reranker()
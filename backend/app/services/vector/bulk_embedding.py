@@ -0,0 +1,89 @@
+"""
+批量向量编码模块
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
+import numpy as np
+from app.services.vector.embedder import Embedder
+
+logger = logging.getLogger(__name__)
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int) -> List[np.ndarray]:
+    """
+    按长度排序后切分批次，同一批次内的文本长度相近，补齐到批内最长文本时浪费的计算最少
+    
+    Args:
+        lengths: 每个文本的token数
+        batch_size: 每批的文本数量
+    
+    Returns:
+        批次列表，每个批次为原始位置的下标数组
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    batch_size = max(1, batch_size)
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def padding_efficiency(lengths: Sequence[int], buckets: List[np.ndarray]) -> float:
+    """
+    有效token数占补齐后token总数的比例
+    
+    Args:
+        lengths: 每个文本的token数
+        buckets: 批次列表
+    
+    Returns:
+        0到1之间的比例，越接近1补齐浪费越少
+    """
+    lengths = np.asarray(lengths)
+    padded = sum(len(bucket) * int(lengths[bucket].max()) for bucket in buckets if len(bucket))
+    return float(lengths.sum() / padded) if padded else 1.0
+
+
+def encode_bucketed(
+    embedder: Embedder,
+    texts: List[str],
+    batch_size: int = 32,
+    threads: int = 1
+) -> np.ndarray:
+    """
+    按长度分桶编码文本，结果按输入顺序返回
+    
+    嵌入模型自身已按长度排序分批时（sentence-transformers）直接编码，
+    避免为分桶额外分词一次，分桶只对ONNX后端生效
+    
+    Args:
+        embedder: 嵌入模型
+        texts: 文本列表
+        batch_size: 每个模型批次的文本数量
+        threads: 并行编码的批次数，为1时在当前线程依次编码（仅在分桶时使用）
+    
+    Returns:
+        float32向量矩阵，行顺序与 texts 一致
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    
+    if embedder.sorts_by_length:
+        return embedder.encode(texts, batch_size=batch_size)
+    
+    lengths = embedder.token_lengths(texts)
+    buckets = length_buckets(lengths, batch_size)
+    logger.debug("批量编码 %d 个文本，%d 个批次，补齐效率 %.2f", len(texts), len(buckets), padding_efficiency(lengths, buckets))
+    
+    def encode_bucket(bucket: np.ndarray) -> np.ndarray:
+        return embedder.encode([texts[i] for i in bucket], batch_size=len(bucket))
+    
+    if threads > 1 and len(buckets) > 1:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bulk-embedding") as executor:
+            results = list(executor.map(encode_bucket, buckets))
+    else:
+        results = [encode_bucket(bucket) for bucket in buckets]
+    
+    # 按原始位置写回，恢复输入顺序
+    embeddings = np.empty((len(texts), results[0].shape[1]), dtype=np.float32)
+    for bucket, result in zip(buckets, results):
+        embeddings[bucket] = result
+    return embeddings
@@ -1,38 +1,296 @@
 """
 ChromaDB向量数据库服务模块
 """
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
+import asyncio
+import functools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Executor
+from datetime import datetime
+from typing import List, Dict, Optional, Callable, Any, Sequence
+import numpy as np
+from tenacity import Retrying, stop_after_attempt, wait_exponential
 from app.core.config import settings
+from app.services.vector.chunk_ids import make_chunk_id
+from app.services.vector.embedding_batcher import EmbeddingBatcher
+from app.services.vector.embedding_cache import QueryEmbeddingCache
+from app.services.vector.bulk_embedding import encode_bucketed
+from app.services.vector.chunk_embedding_cache import ChunkEmbeddingCache
+from app.services.vector.embedder import create_embedder, embedder_name
+from app.services.vector.keyword_index import KeywordIndex
+from app.services.vector.filters import build_where
+from app.services.vector.vector_store import create_vector_client
+
+COLLECTION_METADATA = {"description": "法规文档向量集合"}
+
+# 别名集合名称后缀，其元数据中的target为当前生效的版本集合
+ALIAS_SUFFIX = "__alias"
+
+# 知识库版本集合名称后缀，其元数据中的version在每次写入、删除或切换别名后更新
+KB_VERSION_SUFFIX = "__version"
+
+# 版本集合名称分隔符，版本集合命名为 {CHROMA_COLLECTION_NAME}_v{时间戳}
+VERSION_SEPARATOR = "_v"
 
 
 class ChromaService:
-    """ChromaDB服务类"""
+    """
+    ChromaDB服务类
+    
+    向量存储客户端和嵌入模型在首次使用时才创建，导入模块不会加载模型或连接ChromaDB；
+    API服务在启动时通过 warmup 主动预热。
+    """
     
     def __init__(self):
-        """初始化ChromaDB客户端和嵌入模型"""
-        # 初始化ChromaDB客户端
-        self.client = chromadb.HttpClient(
-            host=settings.CHROMA_HOST,
-            port=settings.CHROMA_PORT,
-            settings=ChromaSettings(anonymized_telemetry=False)
+        """初始化线程池和缓存，向量存储客户端和嵌入模型延迟创建"""
+        self._client = None
+        self._embedder = None
+        self._init_lock = threading.Lock()
+        
+        # 本地向量索引直接接收numpy数组，ChromaDB客户端要求Python列表
+        self._accepts_numpy = settings.VECTOR_STORE_BACKEND == "local"
+        
+        # 读取方通过别名解析当前生效的集合；重建时写入新的版本集合，
+        # 完成后原子切换别名，读取方不会看到空的或不完整的知识库
+        self.alias_name = f"{settings.CHROMA_COLLECTION_NAME}{ALIAS_SUFFIX}"
+        self._collection = None
+        self._alias_checked_at = 0.0
+        self._alias_lock = threading.Lock()
+        self._collections: Dict[str, Any] = {}
+        
+        # 知识库版本标识，用于使依赖知识库内容的缓存失效；保存在向量存储中，
+        # 其他进程（入库脚本、其他API进程）的写入在下次解析别名时即可感知
+        self.kb_version_name = f"{settings.CHROMA_COLLECTION_NAME}{KB_VERSION_SUFFIX}"
+        self._kb_version = ""
+        
+        # 向量编码为CPU密集型任务，ChromaDB客户端为同步阻塞调用，
+        # 分别放到有界线程池中执行，避免阻塞事件循环
+        self._embedding_executor = ThreadPoolExecutor(
+            max_workers=settings.EMBEDDING_WORKERS,
+            thread_name_prefix="embedding"
+        )
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=settings.CHROMA_IO_WORKERS,
+            thread_name_prefix="chroma-io"
+        )
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.CHROMA_UPSERT_CONCURRENCY),
+            thread_name_prefix="chroma-write"
         )
         
-        # 初始化嵌入模型
-        self.embedding_model = SentenceTransformer(
-            settings.EMBEDDING_MODEL,
-            device=settings.EMBEDDING_DEVICE
+        # 并发查询的向量编码合并为小批次执行
+        self._query_batcher = EmbeddingBatcher(
+            encode_fn=self.embed_texts,
+            executor=self._embedding_executor,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            max_concurrent_batches=settings.EMBEDDING_WORKERS
         )
         
-        # 获取或创建集合
-        self.collection = self.client.get_or_create_collection(
-            name=settings.CHROMA_COLLECTION_NAME,
-            metadata={"description": "法规文档向量集合"}
+        # 查询向量缓存，热门问题无需重复编码，以模型和推理后端标识区分
+        self.embedder_name = embedder_name()
+        self.query_cache = QueryEmbeddingCache(
+            max_entries=settings.QUERY_EMBEDDING_CACHE_SIZE,
+            ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL
+        )
+        
+        # 文本块向量持久化缓存，重建或调整分块参数时内容未变的文本块无需重新编码
+        self.chunk_cache = ChunkEmbeddingCache() if settings.CHUNK_EMBEDDING_CACHE_ENABLED else None
+        
+        # 关键词索引与向量集合同步写入，按集合名称隔离，供混合检索使用
+        self.keyword_index = KeywordIndex() if settings.KEYWORD_INDEX_ENABLED else None
+    
+    @property
+    def client(self):
+        """向量存储客户端（ChromaDB服务、进程内ChromaDB或本地向量索引），首次访问时创建"""
+        if self._client is None:
+            with self._init_lock:
+                if self._client is None:
+                    self._client = create_vector_client()
+        return self._client
+    
+    @property
+    def embedder(self):
+        """嵌入模型（PyTorch或ONNX Runtime推理，由 EMBEDDING_BACKEND 决定），首次访问时加载"""
+        if self._embedder is None:
+            with self._init_lock:
+                if self._embedder is None:
+                    self._embedder = create_embedder()
+        return self._embedder
+    
+    @property
+    def model_loaded(self) -> bool:
+        """嵌入模型是否已加载"""
+        return self._embedder is not None
+    
+    def warmup(self) -> None:
+        """预热：加载嵌入模型并完成一次编码，连接向量存储并解析当前集合"""
+        self.embed_texts(["预热"])
+        self.collection.count()
+    
+    async def _run_in_executor(
+        self,
+        executor: Executor,
+        func: Callable,
+        *args,
+        **kwargs
+    ) -> Any:
+        """在线程池中执行同步函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+    
+    def _read_alias(self) -> str:
+        """读取别名指向的集合名称，未设置别名时使用默认集合"""
+        alias = self.client.get_or_create_collection(name=self.alias_name)
+        return (alias.metadata or {}).get("target") or settings.CHROMA_COLLECTION_NAME
+    
+    @property
+    def collection(self):
+        """当前生效的集合，定期重新解析别名以感知其他进程的切换"""
+        now = time.monotonic()
+        if self._collection is None or now - self._alias_checked_at > settings.CHROMA_ALIAS_REFRESH_SECONDS:
+            with self._alias_lock:
+                if self._collection is None or now - self._alias_checked_at > settings.CHROMA_ALIAS_REFRESH_SECONDS:
+                    target = self._read_alias()
+                    self._kb_version = self._read_kb_version()
+                    if self._collection is None or self._collection.name != target:
+                        self._collection = self.client.get_or_create_collection(
+                            name=target,
+                            metadata=COLLECTION_METADATA
+                        )
+                    self._alias_checked_at = now
+        return self._collection
+    
+    def _read_kb_version(self) -> str:
+        """读取共享的知识库版本标识"""
+        version = self.client.get_or_create_collection(name=self.kb_version_name)
+        return (version.metadata or {}).get("version") or ""
+    
+    def _bump_kb_version(self, collection_name: Optional[str] = None) -> None:
+        """
+        更新共享的知识库版本标识；写入尚未生效的版本集合时不影响读取，无需更新
+        
+        Args:
+            collection_name: 被修改的集合名称，为空时表示当前生效的集合
+        """
+        if collection_name is not None and collection_name != self.collection.name:
+            return
+        # 使用随机标识而非递增计数，多个进程同时更新时不会产生相同的版本
+        token = uuid.uuid4().hex
+        version = self.client.get_or_create_collection(name=self.kb_version_name)
+        version.modify(metadata={"version": token})
+        self._kb_version = token
+    
+    def _get_collection(self, collection_name: Optional[str] = None):
+        """
+        获取集合
+        
+        Args:
+            collection_name: 集合名称，为空时使用当前生效的集合
+            
+        Returns:
+            ChromaDB集合
+        """
+        if collection_name is None:
+            return self.collection
+        if collection_name not in self._collections:
+            self._collections[collection_name] = self.client.get_collection(collection_name)
+        return self._collections[collection_name]
+    
+    def list_versions(self) -> List[str]:
+        """
+        列出所有版本集合（包括未使用别名前的默认集合），按创建时间排序
+        
+        Returns:
+            集合名称列表
+        """
+        base = settings.CHROMA_COLLECTION_NAME
+        names = [collection.name for collection in self.client.list_collections()]
+        versions = sorted(name for name in names if name.startswith(f"{base}{VERSION_SEPARATOR}"))
+        return ([base] if base in names else []) + versions
+    
+    def create_version(self) -> str:
+        """
+        创建新的版本集合，用于在不影响读取的情况下重建知识库
+        
+        Returns:
+            新集合名称
+        """
+        name = f"{settings.CHROMA_COLLECTION_NAME}{VERSION_SEPARATOR}{datetime.utcnow():%Y%m%d%H%M%S%f}"
+        self._collections[name] = self.client.create_collection(
+            name=name,
+            metadata=COLLECTION_METADATA
         )
+        return name
+    
+    def switch_alias(self, collection_name: str) -> None:
+        """
+        将别名切换到指定集合，之后的读取都使用该集合
+        
+        Args:
+            collection_name: 集合名称
+        """
+        collection = self._get_collection(collection_name)
+        alias = self.client.get_or_create_collection(name=self.alias_name)
+        alias.modify(metadata={"target": collection_name})
+        
+        with self._alias_lock:
+            self._collection = collection
+            self._alias_checked_at = time.monotonic()
+        self._bump_kb_version()
+    
+    def drop_version(self, collection_name: str) -> None:
+        """
+        删除版本集合（不能删除当前生效的集合）
+        
+        Args:
+            collection_name: 集合名称
+        """
+        if collection_name == self.collection.name:
+            raise ValueError(f"不能删除当前生效的集合: {collection_name}")
+        self.client.delete_collection(collection_name)
+        self._collections.pop(collection_name, None)
+        if self.keyword_index is not None:
+            self.keyword_index.drop_collection(collection_name)
     
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+    def gc_versions(self, keep: Optional[int] = None) -> List[str]:
+        """
+        删除旧的版本集合
+        
+        Args:
+            keep: 除当前集合外保留的最近版本数，默认使用 CHROMA_KEEP_VERSIONS
+            
+        Returns:
+            已删除的集合名称列表
+        """
+        if keep is None:
+            keep = settings.CHROMA_KEEP_VERSIONS
+        
+        current = self.collection.name
+        old_versions = [name for name in self.list_versions() if name != current]
+        to_delete = old_versions[:max(len(old_versions) - keep, 0)]
+        
+        for name in to_delete:
+            self.drop_version(name)
+        
+        return to_delete
+    
+    @property
+    def collection_version(self) -> str:
+        """当前知识库版本标识（集合名称和共享的版本标识），随别名定期刷新"""
+        return f"{self.collection.name}:{self._kb_version}"
+    
+    async def acollection_version(self) -> str:
+        """
+        异步获取当前知识库版本标识；刷新别名和版本标识需要访问向量存储，在IO线程池中执行
+        
+        Returns:
+            版本标识
+        """
+        return await self._run_in_executor(self._io_executor, lambda: self.collection_version)
+    
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
         """
         将文本转换为向量
         
@@ -40,10 +298,61 @@ class ChromaService:
             texts: 文本列表
             
         Returns:
-            向量列表
+            float32向量矩阵，形状为 (文本数, 维度)
+        """
+        return self.embedder.encode(texts)
+    
+    def embed_bulk(self, texts: List[str]) -> np.ndarray:
+        """
+        批量编码入库文本：ONNX后端按token长度排序分桶，使用 EMBEDDING_BULK_THREADS 个线程并行编码各批次，
+        再恢复原始顺序，减少短文本补齐到批内最长文本浪费的计算（sentence-transformers 自身已按长度排序）；
+        启用文本块向量缓存时只编码缓存中没有的文本，全部命中时不会加载嵌入模型
+        
+        Args:
+            texts: 文本列表
+            
+        Returns:
+            float32向量矩阵，行顺序与 texts 一致
         """
-        embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        if self.chunk_cache is None:
+            return encode_bucketed(
+                self.embedder,
+                texts,
+                batch_size=settings.EMBEDDING_BULK_BATCH_SIZE,
+                threads=settings.EMBEDDING_BULK_THREADS
+            )
+        
+        embeddings = self.chunk_cache.get_many(self.embedder_name, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = encode_bucketed(
+                self.embedder,
+                missing_texts,
+                batch_size=settings.EMBEDDING_BULK_BATCH_SIZE,
+                threads=settings.EMBEDDING_BULK_THREADS
+            )
+            self.chunk_cache.put_many(self.embedder_name, missing_texts, encoded)
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+        
+        if not embeddings:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(embeddings)
+    
+    def _client_embeddings(self, embeddings: Sequence) -> Sequence:
+        """
+        转换为向量存储客户端接受的格式，只在写入ChromaDB时转换为列表
+        
+        Args:
+            embeddings: 向量矩阵或向量列表
+            
+        Returns:
+            numpy数组或Python列表
+        """
+        if self._accepts_numpy:
+            return embeddings
+        return np.asarray(embeddings, dtype=np.float32).tolist()
     
     def add_documents(
         self,
@@ -59,23 +368,162 @@ class ChromaService:
             metadatas: 元数据列表
             ids: 文档ID列表
         """
-        embeddings = self.embed_texts(documents)
+        embeddings = self.embed_bulk(documents)
+        self.add_embeddings(documents, embeddings, metadatas=metadatas, ids=ids)
+    
+    def add_embeddings(
+        self,
+        documents: List[str],
+        embeddings: Sequence,
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        collection_name: Optional[str] = None
+    ) -> None:
+        """
+        添加已编码的文档到向量数据库
+        
+        使用upsert按批写入，ID相同的文本块会被覆盖，重复执行不会产生重复向量；
+        批次并发写入，失败时按指数退避重试。
+        
+        Args:
+            documents: 文档文本列表
+            embeddings: 向量矩阵（numpy数组或向量列表）
+            metadatas: 元数据列表
+            ids: 文档ID列表，为空时根据来源、块序号和文本内容生成
+            collection_name: 目标集合，为空时写入当前生效的集合
+        """
+        if not documents:
+            return
         
         if ids is None:
-            import uuid
-            ids = [str(uuid.uuid4()) for _ in documents]
-        
-        self.collection.add(
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+            ids = [
+                make_chunk_id(
+                    (metadata or {}).get("source", ""),
+                    (metadata or {}).get("chunk_index", i),
+                    document
+                )
+                for i, (document, metadata) in enumerate(zip(documents, metadatas or [None] * len(documents)))
+            ]
+        
+        collection = self._get_collection(collection_name)
+        batch_size = max(1, settings.CHROMA_UPSERT_BATCH_SIZE)
+        batches = [
+            (
+                ids[start:start + batch_size],
+                embeddings[start:start + batch_size],
+                documents[start:start + batch_size],
+                metadatas[start:start + batch_size] if metadatas else None
+            )
+            for start in range(0, len(documents), batch_size)
+        ]
+        
+        if len(batches) == 1:
+            self._upsert_batch(collection, *batches[0])
+        else:
+            futures = [
+                self._write_executor.submit(self._upsert_batch, collection, *batch)
+                for batch in batches
+            ]
+            for future in futures:
+                future.result()
+        
+        if self.keyword_index is not None:
+            self.keyword_index.upsert(collection.name, ids, documents, metadatas)
+        
+        self._bump_kb_version(collection.name)
+    
+    def _upsert_batch(
+        self,
+        collection,
+        ids: List[str],
+        embeddings: Sequence,
+        documents: List[str],
+        metadatas: Optional[List[Dict]]
+    ) -> None:
+        """写入一个批次，失败时按指数退避重试"""
+        for attempt in Retrying(
+            stop=stop_after_attempt(max(1, settings.CHROMA_UPSERT_RETRIES)),
+            wait=wait_exponential(multiplier=settings.CHROMA_UPSERT_RETRY_BACKOFF, max=30),
+            reraise=True
+        ):
+            with attempt:
+                collection.upsert(
+                    ids=ids,
+                    embeddings=self._client_embeddings(embeddings),
+                    documents=documents,
+                    metadatas=metadatas
+                )
+    
+    def delete_ids(self, ids: List[str], collection_name: Optional[str] = None) -> None:
+        """
+        按ID删除向量
+        
+        Args:
+            ids: 文档ID列表
+            collection_name: 目标集合，为空时使用当前生效的集合
+        """
+        if not ids:
+            return
+        
+        collection = self._get_collection(collection_name)
+        collection.delete(ids=ids)
+        if self.keyword_index is not None:
+            self.keyword_index.delete_ids(collection.name, ids)
+        self._bump_kb_version(collection.name)
+    
+    def delete_by_sources(self, sources: List[str], collection_name: Optional[str] = None) -> None:
+        """
+        按来源（元数据source字段）删除向量
+        
+        Args:
+            sources: 来源列表
+            collection_name: 目标集合，为空时使用当前生效的集合
+        """
+        sources = list(dict.fromkeys(sources))
+        if not sources:
+            return
+        
+        collection = self._get_collection(collection_name)
+        batch_size = max(1, settings.CHROMA_UPSERT_BATCH_SIZE)
+        for start in range(0, len(sources), batch_size):
+            batch = sources[start:start + batch_size]
+            where = {"source": batch[0]} if len(batch) == 1 else {"source": {"$in": batch}}
+            collection.delete(where=where)
+        if self.keyword_index is not None:
+            self.keyword_index.delete_sources(collection.name, sources)
+        self._bump_kb_version(collection.name)
+    
+    def delete_by_source(self, source: str, collection_name: Optional[str] = None) -> None:
+        """
+        按来源删除向量
+        
+        Args:
+            source: 来源（相对文档目录的路径）
+            collection_name: 目标集合，为空时使用当前生效的集合
+        """
+        self.delete_by_sources([source], collection_name=collection_name)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        编码查询文本，优先使用缓存
+        
+        Args:
+            query: 查询文本
+            
+        Returns:
+            查询向量
+        """
+        embedding = self.query_cache.get(self.embedder_name, query)
+        if embedding is None:
+            embedding = self.embed_texts([query])[0]
+            self.query_cache.put(self.embedder_name, query, embedding)
+        return embedding
     
     def search(
         self,
         query: str,
-        top_k: int = None
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> Dict:
         """
         搜索相关文档
@@ -83,6 +531,27 @@ class ChromaService:
         Args:
             query: 查询文本
             top_k: 返回结果数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            搜索结果
+        """
+        query_embedding = self.embed_query(query)
+        return self.search_by_embedding(query_embedding, top_k=top_k, filters=filters)
+    
+    def search_by_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        使用查询向量搜索相关文档，过滤条件下推到ChromaDB执行
+        
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回结果数量
+            filters: 元数据过滤条件
             
         Returns:
             搜索结果
@@ -90,22 +559,157 @@ class ChromaService:
         if top_k is None:
             top_k = settings.TOP_K
         
-        query_embedding = self.embed_texts([query])[0]
-        
         results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
+            query_embeddings=self._client_embeddings([query_embedding]),
+            n_results=top_k,
+            where=build_where(filters)
         )
         
         return results
     
+    def keyword_search(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        使用BM25关键词检索相关文档
+        
+        Args:
+            query: 查询文本
+            top_k: 返回结果数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            搜索结果，格式与向量检索相同；未启用关键词索引时返回空结果
+        """
+        if top_k is None:
+            top_k = settings.TOP_K
+        
+        if self.keyword_index is None:
+            return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        
+        return self.keyword_index.search(self.collection.name, query, top_k, filters=filters)
+    
+    async def aembed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        异步将文本转换为向量（在编码线程池中执行）
+        
+        Args:
+            texts: 文本列表
+            
+        Returns:
+            向量列表
+        """
+        return await self._run_in_executor(self._embedding_executor, self.embed_texts, texts)
+    
+    async def aembed_query(self, query: str) -> np.ndarray:
+        """
+        异步编码查询文本，优先使用缓存，未命中时与其他并发查询合并为批次
+        
+        Args:
+            query: 查询文本
+            
+        Returns:
+            查询向量
+        """
+        embedding = self.query_cache.get(self.embedder_name, query)
+        if embedding is None:
+            embedding = await self._query_batcher.embed(query)
+            self.query_cache.put(self.embedder_name, query, embedding)
+        return embedding
+    
+    async def asearch_by_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        异步使用查询向量搜索相关文档
+        
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回结果数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            搜索结果
+        """
+        return await self._run_in_executor(
+            self._io_executor,
+            self.search_by_embedding,
+            query_embedding,
+            top_k=top_k,
+            filters=filters
+        )
+    
+    async def asearch(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        异步搜索相关文档，编码和ChromaDB查询均不阻塞事件循环
+        
+        Args:
+            query: 查询文本
+            top_k: 返回结果数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            搜索结果
+        """
+        query_embedding = await self.aembed_query(query)
+        return await self.asearch_by_embedding(query_embedding, top_k=top_k, filters=filters)
+    
+    async def akeyword_search(
+        self,
+        query: str,
+        top_k: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        异步使用BM25关键词检索相关文档
+        
+        Args:
+            query: 查询文本
+            top_k: 返回结果数量
+            filters: 元数据过滤条件
+            
+        Returns:
+            搜索结果
+        """
+        return await self._run_in_executor(
+            self._io_executor,
+            self.keyword_search,
+            query,
+            top_k=top_k,
+            filters=filters
+        )
+    
     def delete_collection(self) -> None:
-        """删除集合"""
-        self.client.delete_collection(settings.CHROMA_COLLECTION_NAME)
+        """删除当前生效的集合（读取方会看到空的知识库，重建请使用版本集合）"""
+        name = self.collection.name
+        self.client.delete_collection(name)
+        if self.keyword_index is not None:
+            self.keyword_index.drop_collection(name)
+        with self._alias_lock:
+            self._collection = None
+        self._bump_kb_version()
     
     def count(self) -> int:
         """获取文档数量"""
         return self.collection.count()
+    
+    def shutdown(self) -> None:
+        """关闭批处理任务和线程池"""
+        self._query_batcher.close()
+        self._embedding_executor.shutdown(wait=False, cancel_futures=True)
+        self._io_executor.shutdown(wait=False, cancel_futures=True)
+        self._write_executor.shutdown(wait=False, cancel_futures=True)
 
 
 # 创建全局实例
@@ -0,0 +1,170 @@
+"""
+文本块向量持久化缓存模块
+"""
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence
+import numpy as np
+from app.core.config import settings
+
+# 每条查询语句的最大参数数量，低于SQLite的默认上限
+_MAX_PARAMS = 500
+
+
+def text_hash(text: str) -> bytes:
+    """文本内容的SHA-256摘要"""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class ChunkEmbeddingCache:
+    """
+    文本块向量持久化缓存（SQLite）
+    
+    以（嵌入模型标识, 文本内容哈希）为键保存float32向量。重建知识库、调整分块参数或元数据时，
+    内容未变的文本块直接读取缓存，不再重新编码；向量数据库数据丢失后的重建只受磁盘读写速度限制。
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 缓存数据库文件路径，默认使用 CHUNK_EMBEDDING_CACHE_PATH
+        """
+        self.path = path or settings.CHUNK_EMBEDDING_CACHE_PATH
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS chunk_embeddings (
+                            model TEXT NOT NULL,
+                            text_hash BLOB NOT NULL,
+                            dim INTEGER NOT NULL,
+                            vector BLOB NOT NULL,
+                            PRIMARY KEY (model, text_hash)
+                        ) WITHOUT ROWID
+                    """)
+                    connection.commit()
+                    self._initialized = True
+        return connection
+    
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        批量读取向量
+        
+        Args:
+            model: 嵌入模型标识
+            texts: 文本列表
+        
+        Returns:
+            与 texts 对应的向量列表，未缓存的位置为None
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+        connection = self._connect()
+        
+        unique = list(set(hashes))
+        for start in range(0, len(unique), _MAX_PARAMS):
+            batch = unique[start:start + _MAX_PARAMS]
+            rows = connection.execute(
+                f"SELECT text_hash, dim, vector FROM chunk_embeddings "
+                f"WHERE model = ? AND text_hash IN ({', '.join('?' * len(batch))})",
+                [model, *batch]
+            )
+            for digest, dim, vector in rows:
+                embedding = np.frombuffer(vector, dtype=np.float32)
+                if embedding.shape[0] == dim:
+                    found[digest] = embedding
+        
+        results = [found.get(digest) for digest in hashes]
+        hits = sum(result is not None for result in results)
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+    
+    def put_many(self, model: str, texts: Sequence[str], embeddings: np.ndarray) -> None:
+        """
+        批量写入向量，已存在时覆盖
+        
+        Args:
+            model: 嵌入模型标识
+            texts: 文本列表
+            embeddings: 与 texts 对应的向量矩阵
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        rows = [
+            (model, text_hash(text), int(embedding.shape[0]), embedding.tobytes())
+            for text, embedding in zip(texts, embeddings)
+        ]
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO chunk_embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+    
+    def count(self, model: Optional[str] = None) -> int:
+        """
+        缓存的向量数量
+        
+        Args:
+            model: 嵌入模型标识，为空时统计全部模型
+        
+        Returns:
+            向量数量
+        """
+        connection = self._connect()
+        if model is None:
+            return connection.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+        return connection.execute(
+            "SELECT COUNT(*) FROM chunk_embeddings WHERE model = ?", (model,)
+        ).fetchone()[0]
+    
+    def clear(self, model: Optional[str] = None) -> None:
+        """
+        清空缓存
+        
+        Args:
+            model: 嵌入模型标识，为空时清空全部模型
+        """
+        connection = self._connect()
+        with connection:
+            if model is None:
+                connection.execute("DELETE FROM chunk_embeddings")
+            else:
+                connection.execute("DELETE FROM chunk_embeddings WHERE model = ?", (model,))
+    
+    def stats(self) -> Dict:
+        """
+        获取缓存统计信息
+        
+        Returns:
+            包含命中、未命中等计数的字典
+        """
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": True,
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
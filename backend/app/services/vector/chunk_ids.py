@@ -0,0 +1,22 @@
+"""
+文本块ID生成模块
+"""
+import hashlib
+
+
+def make_chunk_id(source: str, chunk_index: int, text: str) -> str:
+    """
+    根据来源、块序号和文本内容生成确定性的文本块ID，
+    重复入库同一内容时ID不变，配合upsert可避免产生重复向量
+    
+    Args:
+        source: 文档来源
+        chunk_index: 文本块序号
+        text: 文本内容
+        
+    Returns:
+        32位十六进制ID
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    key = f"{source}\x1f{chunk_index}\x1f{text_hash}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
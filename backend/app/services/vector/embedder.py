@@ -0,0 +1,302 @@
+"""
+嵌入模型后端模块
+"""
+import inspect
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Protocol
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("sentence_transformers", "onnx")
+
+# ONNX导出目录中的文件名
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "embedder.json"
+
+
+class Embedder(Protocol):
+    """
+    嵌入模型接口
+    
+    name 标识模型和推理后端，用作查询向量缓存的键；
+    encode 返回float32矩阵，形状为 (文本数, 维度)；
+    sorts_by_length 表示 encode 内部已按长度排序分批，批量编码时无需再按 token_lengths 分桶。
+    """
+    
+    name: str
+    sorts_by_length: bool
+    
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        ...
+    
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        ...
+
+
+class SentenceTransformerEmbedder:
+    """使用 sentence-transformers（PyTorch）推理的嵌入模型"""
+    
+    # SentenceTransformer.encode 会先按文本长度排序再切分批次
+    sorts_by_length = True
+    
+    def __init__(self, model_name: str, device: str = "cpu"):
+        # 延迟导入，sentence_transformers会同时导入torch
+        from sentence_transformers import SentenceTransformer
+        
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device=device)
+    
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        编码文本
+        
+        Args:
+            texts: 文本列表
+            batch_size: 批次大小，默认为32
+        
+        Returns:
+            float32向量矩阵
+        """
+        embeddings = self.model.encode(texts, batch_size=batch_size or 32, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """截断后的token数（含特殊token），用于按长度分桶"""
+        encoded = self.model.tokenizer(texts, truncation=True, max_length=self.model.max_seq_length)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+def onnx_model_dir(model_name: str) -> Path:
+    """模型的ONNX导出目录"""
+    return Path(settings.EMBEDDING_ONNX_DIR) / model_name.replace("/", "__")
+
+
+def export_onnx(model_name: str, output_dir: Path, quantize: bool = False) -> Path:
+    """
+    将 sentence-transformers 模型的Transformer部分导出为ONNX，并保存分词器和池化配置
+    
+    Args:
+        model_name: 模型名称或路径
+        output_dir: 导出目录
+        quantize: 是否同时生成动态int8量化模型
+    
+    Returns:
+        导出目录
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    
+    pooling = next((module for module in model if isinstance(module, Pooling)), None)
+    config = {
+        "model": model_name,
+        "pooling": pooling.get_pooling_mode_str() if pooling else "cls",
+        "normalize": any(isinstance(module, Normalize) for module in model),
+        "max_seq_length": model.max_seq_length
+    }
+    
+    # ONNX图的输入按forward的参数顺序排列，与分词器输出的键顺序不一定相同
+    sample = tokenizer(["导出"], return_tensors="pt")
+    parameters = list(inspect.signature(transformer.forward).parameters)
+    input_names = sorted(sample.keys(), key=parameters.index)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            args=({name: sample[name] for name in input_names},),
+            f=str(output_dir / ONNX_MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    
+    tokenizer.save_pretrained(str(output_dir))
+    (output_dir / ONNX_CONFIG_FILE).write_text(json.dumps(config, ensure_ascii=False, indent=2))
+    
+    if quantize:
+        quantize_onnx(output_dir)
+    
+    logger.info("已导出ONNX嵌入模型: %s -> %s", model_name, output_dir)
+    return output_dir
+
+
+def quantize_onnx(model_dir: Path) -> Path:
+    """
+    对导出的ONNX模型做动态int8量化（权重int8，激活在推理时动态量化）
+    
+    Args:
+        model_dir: 导出目录
+    
+    Returns:
+        量化模型路径
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    output = model_dir / ONNX_INT8_MODEL_FILE
+    quantize_dynamic(
+        str(model_dir / ONNX_MODEL_FILE),
+        str(output),
+        weight_type=QuantType.QInt8
+    )
+    return output
+
+
+class OnnxEmbedder:
+    """
+    使用 ONNX Runtime 在CPU上推理的嵌入模型
+    
+    首次使用时从 sentence-transformers 模型导出ONNX，池化方式和是否归一化沿用原模型配置，
+    输出与PyTorch推理一致；启用量化时使用动态int8量化模型，可以用
+    scripts/check_embedder_parity.py 检查与PyTorch向量的一致性。
+    """
+    
+    # encode 按输入顺序切分批次，批量编码时由调用方按长度分桶
+    sorts_by_length = False
+    
+    def __init__(
+        self,
+        model_name: str,
+        model_dir: Optional[Path] = None,
+        quantize: bool = False,
+        threads: int = 0
+    ):
+        """
+        Args:
+            model_name: 模型名称或路径
+            model_dir: ONNX导出目录，默认为 EMBEDDING_ONNX_DIR 下以模型名称命名的子目录
+            quantize: 是否使用动态int8量化模型
+            threads: 每次推理使用的线程数，为0时由ONNX Runtime决定
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        model_dir = Path(model_dir) if model_dir else onnx_model_dir(model_name)
+        if not (model_dir / ONNX_MODEL_FILE).exists():
+            export_onnx(model_name, model_dir, quantize=quantize)
+        if quantize and not (model_dir / ONNX_INT8_MODEL_FILE).exists():
+            quantize_onnx(model_dir)
+        
+        self.name = f"{model_name}@onnx-int8" if quantize else f"{model_name}@onnx"
+        self.config: Dict[str, Any] = json.loads((model_dir / ONNX_CONFIG_FILE).read_text())
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = ONNX_INT8_MODEL_FILE if quantize else ONNX_MODEL_FILE
+        self.session = ort.InferenceSession(
+            str(model_dir / model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {item.name for item in self.session.get_inputs()}
+    
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """截断后的token数（含特殊token），用于按长度分桶"""
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.config["max_seq_length"])
+        return [len(ids) for ids in encoded["input_ids"]]
+    
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """按原模型的池化方式将token向量池化为句向量"""
+        mode = self.config["pooling"]
+        if mode == "cls":
+            return hidden[:, 0]
+        
+        mask = attention_mask[:, :, None].astype(np.float32)
+        if mode == "max":
+            return np.where(mask > 0, hidden, -np.inf).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        编码文本
+        
+        Args:
+            texts: 文本列表
+            batch_size: 批次大小，默认为32
+        
+        Returns:
+            float32向量矩阵
+        """
+        batch_size = batch_size or 32
+        batches = []
+        
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_seq_length"],
+                return_tensors="np"
+            )
+            feed = {
+                name: np.asarray(value, dtype=np.int64)
+                for name, value in inputs.items() if name in self._input_names
+            }
+            hidden = self.session.run(None, feed)[0]
+            batches.append(self._pool(hidden, inputs["attention_mask"]))
+        
+        if not batches:
+            return np.zeros((0, 0), dtype=np.float32)
+        
+        embeddings = np.concatenate(batches).astype(np.float32, copy=False)
+        if self.config["normalize"]:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+
+def embedder_name(backend: Optional[str] = None) -> str:
+    """
+    当前配置的嵌入模型标识，无需加载模型，不同推理后端输出的向量略有差异，标识中包含后端
+    
+    Args:
+        backend: 推理后端，默认使用 EMBEDDING_BACKEND
+    
+    Returns:
+        模型标识
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        return f"{settings.EMBEDDING_MODEL}@onnx-int8" if settings.EMBEDDING_ONNX_QUANTIZE else f"{settings.EMBEDDING_MODEL}@onnx"
+    return settings.EMBEDDING_MODEL
+
+
+def create_embedder(backend: Optional[str] = None) -> Embedder:
+    """
+    根据配置创建嵌入模型
+    
+    Args:
+        backend: 推理后端，默认使用 EMBEDDING_BACKEND：
+            sentence_transformers 使用PyTorch推理；
+            onnx 使用ONNX Runtime推理，EMBEDDING_ONNX_QUANTIZE 为true时使用动态int8量化模型
+    
+    Returns:
+        嵌入模型
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    
+    if backend == "sentence_transformers":
+        return SentenceTransformerEmbedder(settings.EMBEDDING_MODEL, device=settings.EMBEDDING_DEVICE)
+    
+    if backend == "onnx":
+        return OnnxEmbedder(
+            settings.EMBEDDING_MODEL,
+            quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+            threads=settings.EMBEDDING_ONNX_THREADS
+        )
+    
+    raise ValueError(f"不支持的嵌入模型后端: {backend}，可选值: {', '.join(EMBEDDING_BACKENDS)}")
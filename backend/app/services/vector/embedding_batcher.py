@@ -0,0 +1,133 @@
+"""
+查询向量动态批处理模块
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Callable, Optional, Set, Tuple
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """
+    查询向量动态批处理器
+    
+    将并发请求的查询文本收集到按时间和数量限定的小批次中，
+    每个批次只调用一次编码函数，再将结果分发给各个等待的调用方。
+    """
+    
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        executor: Executor,
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_concurrent_batches: int = 1
+    ):
+        """
+        Args:
+            encode_fn: 批量编码函数
+            executor: 执行编码的线程池
+            max_batch_size: 每个批次的最大文本数
+            max_wait_ms: 收集批次的最长等待时间（毫秒）
+            max_concurrent_batches: 同时执行的最大批次数
+        """
+        self.encode_fn = encode_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # 执行中的批次任务，事件循环只弱引用任务，需要保留引用避免被回收
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def _ensure_worker(self) -> None:
+        """在当前事件循环中启动批处理任务"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+        
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = loop.create_task(self._run())
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        编码单条查询文本，与并发请求合并为批次执行
+        
+        Args:
+            text: 查询文本
+        
+        Returns:
+            查询向量
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+    
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """收集一个批次：等待第一条请求，然后在时间窗口内继续收集"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        # 跳过已被取消的请求（如客户端已断开）
+        return [(text, future) for text, future in batch if not future.done()]
+    
+    async def _run(self) -> None:
+        """批处理主循环"""
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            
+            await self._semaphore.acquire()
+            task = self._loop.create_task(self._encode_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """编码一个批次并分发结果"""
+        try:
+            texts = [text for text, _ in batch]
+            embeddings = await self._loop.run_in_executor(self.executor, self.encode_fn, texts)
+        except asyncio.CancelledError:
+            # 批处理器关闭时取消等待中的调用方，避免其永久等待
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            self._semaphore.release()
+    
+    def close(self) -> None:
+        """停止批处理任务并取消执行中的批次"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for task in list(self._tasks):
+            task.cancel()
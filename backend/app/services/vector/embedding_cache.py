@@ -0,0 +1,129 @@
+"""
+查询向量缓存模块
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """
+    规范化查询文本：全角转半角、去除首尾空白、合并连续空白、统一小写
+    
+    Args:
+        text: 查询文本
+    
+    Returns:
+        规范化后的文本
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.lower()
+
+
+class QueryEmbeddingCache:
+    """
+    查询向量缓存（LRU淘汰 + 可选TTL）
+    
+    以（嵌入模型名称, 规范化查询文本）为键，线程安全。
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float = 0):
+        """
+        Args:
+            max_entries: 最大缓存条目数，为0时禁用缓存
+            ttl_seconds: 条目有效期（秒），为0时永不过期
+        """
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.max_entries > 0
+    
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        """
+        获取缓存的查询向量
+        
+        Args:
+            model_name: 嵌入模型名称
+            query: 查询文本
+        
+        Returns:
+            查询向量，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                embedding, created_at = entry
+                if self.ttl_seconds and time.monotonic() - created_at > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+            self.misses += 1
+            return None
+    
+    def put(self, model_name: str, query: str, embedding: np.ndarray) -> None:
+        """
+        写入查询向量
+        
+        Args:
+            model_name: 嵌入模型名称
+            query: 查询文本
+            embedding: 查询向量
+        """
+        if not self.enabled:
+            return
+        
+        # 复制为独立的只读数组，避免引用整个批次矩阵或被调用方修改
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """
+        获取缓存统计信息
+        
+        Returns:
+            包含命中、未命中等计数的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,139 @@
+"""
+检索过滤条件模块
+"""
+import json
+from datetime import date
+from typing import List, Dict, Optional, Tuple, Any
+
+
+def _date_int(value: Any) -> Optional[int]:
+    """将日期（date、YYYY-MM-DD字符串或yyyymmdd整数）转换为yyyymmdd整数"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, int):
+        return value
+    return int(str(value).replace("-", ""))
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    规范化过滤条件，去掉空值
+    
+    Args:
+        filters: 过滤条件，支持 sources（文档来源，即相对文档目录的路径）、categories（列表），effective_from、effective_to（日期），
+            in_force（为true时只检索施行日期不晚于今天的文档，未识别出施行日期的文档视为已施行）
+    
+    Returns:
+        规范化后的过滤条件，日期转换为yyyymmdd整数，in_force转换为今天的日期
+    """
+    filters = filters or {}
+    normalized: Dict[str, Any] = {}
+    
+    for key in ("sources", "categories"):
+        values = [value for value in (filters.get(key) or []) if value]
+        if values:
+            normalized[key] = sorted(set(values))
+    
+    effective_from = _date_int(filters.get("effective_from"))
+    effective_to = _date_int(filters.get("effective_to"))
+    
+    if effective_from is not None:
+        normalized["effective_from"] = effective_from
+    if effective_to is not None:
+        normalized["effective_to"] = effective_to
+    if filters.get("in_force"):
+        normalized["in_force"] = _date_int(date.today())
+    
+    return normalized
+
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    """
+    过滤条件的稳定字符串表示，用于缓存键
+    
+    Args:
+        filters: 过滤条件
+    
+    Returns:
+        JSON字符串
+    """
+    return json.dumps(normalize_filters(filters), sort_keys=True, ensure_ascii=False)
+
+
+def _in_condition(field: str, values: List[str]) -> Dict:
+    """单个值时使用相等条件，多个值时使用$in"""
+    return {field: values[0]} if len(values) == 1 else {field: {"$in": values}}
+
+
+def build_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict]:
+    """
+    将过滤条件转换为ChromaDB的where条件
+    
+    未识别出施行日期的文本块 effective_date_int 为0：施行日期范围只匹配有日期的文档，
+    in_force 的条件同时匹配未识别出日期的文档
+    
+    Args:
+        filters: 过滤条件
+    
+    Returns:
+        where条件，没有过滤条件时返回None
+    """
+    filters = normalize_filters(filters)
+    conditions = []
+    
+    if "sources" in filters:
+        conditions.append(_in_condition("source", filters["sources"]))
+    if "categories" in filters:
+        conditions.append(_in_condition("category", filters["categories"]))
+    if "effective_from" in filters or "effective_to" in filters:
+        conditions.append({"effective_date_int": {"$gte": filters.get("effective_from", 1)}})
+    if "effective_to" in filters:
+        conditions.append({"effective_date_int": {"$lte": filters["effective_to"]}})
+    if "in_force" in filters:
+        conditions.append({"effective_date_int": {"$lte": filters["in_force"]}})
+    
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def build_sql(filters: Optional[Dict[str, Any]], alias: str = "r") -> Tuple[str, List[Any]]:
+    """
+    将过滤条件转换为关键词索引的SQL条件，日期条件的匹配规则同 build_where，
+    没有 effective_date_int 字段的旧文本块视为未识别出施行日期
+    
+    Args:
+        filters: 过滤条件
+        alias: chunk_rows表的别名
+    
+    Returns:
+        (以AND开头的SQL条件片段, 参数列表)，没有过滤条件时为空字符串
+    """
+    filters = normalize_filters(filters)
+    clauses = []
+    params: List[Any] = []
+    
+    if "sources" in filters:
+        clauses.append(f"{alias}.source IN ({', '.join('?' * len(filters['sources']))})")
+        params.extend(filters["sources"])
+    if "categories" in filters:
+        clauses.append(
+            f"json_extract({alias}.metadata, '$.category') IN ({', '.join('?' * len(filters['categories']))})"
+        )
+        params.extend(filters["categories"])
+    effective_date = f"COALESCE(json_extract({alias}.metadata, '$.effective_date_int'), 0)"
+    if "effective_from" in filters or "effective_to" in filters:
+        clauses.append(f"{effective_date} >= ?")
+        params.append(filters.get("effective_from", 1))
+    if "effective_to" in filters:
+        clauses.append(f"{effective_date} <= ?")
+        params.append(filters["effective_to"])
+    if "in_force" in filters:
+        clauses.append(f"{effective_date} <= ?")
+        params.append(filters["in_force"])
+    
+    return "".join(f" AND {clause}" for clause in clauses), params
@@ -0,0 +1,243 @@
+"""
+关键词倒排索引模块（BM25）
+"""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Any
+from app.core.config import settings
+from app.services.vector.filters import build_sql
+
+try:
+    import jieba
+except ImportError:  # jieba为可选依赖，未安装时使用字符二元组分词
+    jieba = None
+
+_CJK_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+")
+_WORD_PATTERN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[a-z0-9]+(?:\.[0-9]+)*")
+
+
+def _bigrams(text: str) -> List[str]:
+    """中文字符二元组，单字时返回该字"""
+    if len(text) == 1:
+        return [text]
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：中文使用jieba搜索模式（未安装时使用字符二元组），英文和数字按词切分
+    
+    Args:
+        text: 文本
+    
+    Returns:
+        词项列表
+    """
+    use_jieba = settings.KEYWORD_TOKENIZER == "jieba" or (
+        settings.KEYWORD_TOKENIZER == "auto" and jieba is not None
+    )
+    
+    tokens = []
+    for match in _WORD_PATTERN.finditer(text.lower()):
+        word = match.group()
+        if not _CJK_PATTERN.fullmatch(word):
+            tokens.append(word)
+        elif use_jieba:
+            tokens.extend(token for token in jieba.lcut_for_search(word) if token.strip())
+        else:
+            tokens.extend(_bigrams(word))
+    return tokens
+
+
+class KeywordIndex:
+    """
+    基于SQLite FTS5的关键词倒排索引
+    
+    与向量集合保存相同的文本块，按集合名称隔离，使用BM25排序。
+    文本在写入前完成分词，FTS5只负责按空格切分词项，因此中文检索不依赖SQLite的分词器。
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 索引数据库文件路径，默认使用 KEYWORD_INDEX_PATH
+        """
+        self.path = path or settings.KEYWORD_INDEX_PATH
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._create_schema(connection)
+                    self._initialized = True
+        return connection
+    
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        """创建表、索引和同步FTS的触发器"""
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS chunk_rows (
+                id INTEGER PRIMARY KEY,
+                collection TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                source TEXT,
+                document TEXT,
+                metadata TEXT,
+                tokens TEXT,
+                UNIQUE (collection, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS ix_chunk_rows_collection_source
+                ON chunk_rows (collection, source);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(
+                tokens, content='chunk_rows', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunk_rows_ai AFTER INSERT ON chunk_rows BEGIN
+                INSERT INTO chunk_fts (rowid, tokens) VALUES (new.id, new.tokens);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunk_rows_ad AFTER DELETE ON chunk_rows BEGIN
+                INSERT INTO chunk_fts (chunk_fts, rowid, tokens) VALUES ('delete', old.id, old.tokens);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunk_rows_au AFTER UPDATE ON chunk_rows BEGIN
+                INSERT INTO chunk_fts (chunk_fts, rowid, tokens) VALUES ('delete', old.id, old.tokens);
+                INSERT INTO chunk_fts (rowid, tokens) VALUES (new.id, new.tokens);
+            END;
+        """)
+        connection.commit()
+    
+    def upsert(
+        self,
+        collection: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[Dict]] = None
+    ) -> None:
+        """
+        写入文本块，ID相同时覆盖
+        
+        Args:
+            collection: 集合名称
+            ids: 文本块ID列表
+            documents: 文本列表
+            metadatas: 元数据列表
+        """
+        metadatas = metadatas or [{} for _ in documents]
+        rows = [
+            (
+                collection,
+                chunk_id,
+                (metadata or {}).get("source"),
+                document,
+                json.dumps(metadata or {}, ensure_ascii=False),
+                " ".join(tokenize(document))
+            )
+            for chunk_id, document, metadata in zip(ids, documents, metadatas)
+        ]
+        
+        connection = self._connect()
+        with connection:
+            connection.executemany("""
+                INSERT INTO chunk_rows (collection, chunk_id, source, document, metadata, tokens)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (collection, chunk_id) DO UPDATE SET
+                    source = excluded.source,
+                    document = excluded.document,
+                    metadata = excluded.metadata,
+                    tokens = excluded.tokens
+            """, rows)
+    
+    def delete_ids(self, collection: str, ids: Iterable[str]) -> None:
+        """
+        按ID删除文本块
+        
+        Args:
+            collection: 集合名称
+            ids: 文本块ID列表
+        """
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "DELETE FROM chunk_rows WHERE collection = ? AND chunk_id = ?",
+                [(collection, chunk_id) for chunk_id in ids]
+            )
+    
+    def delete_sources(self, collection: str, sources: Iterable[str]) -> None:
+        """
+        按来源删除文本块
+        
+        Args:
+            collection: 集合名称
+            sources: 来源列表
+        """
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "DELETE FROM chunk_rows WHERE collection = ? AND source = ?",
+                [(collection, source) for source in sources]
+            )
+    
+    def drop_collection(self, collection: str) -> None:
+        """
+        删除集合的全部文本块
+        
+        Args:
+            collection: 集合名称
+        """
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM chunk_rows WHERE collection = ?", (collection,))
+    
+    def search(
+        self,
+        collection: str,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict:
+        """
+        BM25关键词检索
+        
+        Args:
+            collection: 集合名称
+            query: 查询文本
+            top_k: 返回结果数量
+            filters: 元数据过滤条件
+        
+        Returns:
+            与ChromaDB查询结果格式相同的字典，distances为BM25得分（越小越相关）
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        results = {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+        if not tokens:
+            return results
+        
+        match = " OR ".join('"' + token.replace('"', '""') + '"' for token in tokens)
+        filter_sql, filter_params = build_sql(filters)
+        rows = self._connect().execute(f"""
+            SELECT r.chunk_id, r.document, r.metadata, bm25(chunk_fts) AS score
+            FROM chunk_fts JOIN chunk_rows r ON r.id = chunk_fts.rowid
+            WHERE chunk_fts MATCH ? AND r.collection = ?{filter_sql}
+            ORDER BY score
+            LIMIT ?
+        """, (match, collection, *filter_params, top_k)).fetchall()
+        
+        for chunk_id, document, metadata, score in rows:
+            results["ids"][0].append(chunk_id)
+            results["documents"][0].append(document)
+            results["metadatas"][0].append(json.loads(metadata) if metadata else {})
+            results["distances"][0].append(score)
+        return results
@@ -0,0 +1,742 @@
+"""
+本地向量索引模块
+"""
+import json
+import re
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Any, Sequence
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+QUANTIZED_FILE = "vectors.q"
+SCALES_FILE = "scales.f32"
+META_FILE = "meta.db"
+
+QUANTIZATIONS = ("none", "float16", "int8")
+_QUANTIZED_DTYPES = {"float16": np.float16, "int8": np.int8}
+
+# 分块计算相似度的行数，限制量化向量转换为float32时的临时内存
+SCORE_BLOCK_ROWS = 65536
+
+# 向量文件的初始容量（行），容量不足时按倍数扩展
+INITIAL_CAPACITY = 1024
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.\-]+$")
+_FIELD_PATTERN = re.compile(r"^[A-Za-z0-9_]+$")
+_COMPARISON_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+# SQLite单条语句的参数数量上限以内的分批大小
+_SQL_BATCH_SIZE = 500
+
+# 等待其他进程释放SQLite写锁的秒数
+_BUSY_TIMEOUT = 30
+
+
+def where_to_sql(where: Optional[Dict]) -> Tuple[str, List[Any]]:
+    """
+    将ChromaDB格式的where条件转换为针对元数据JSON的SQL条件
+    
+    支持 $and、$or 以及 $eq、$ne、$gt、$gte、$lt、$lte、$in、$nin 运算符。
+    
+    Args:
+        where: where条件
+    
+    Returns:
+        (SQL条件, 参数列表)
+    """
+    if not where:
+        return "1", []
+    
+    clauses = []
+    params: List[Any] = []
+    
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(condition) for condition in value]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(part[0] for part in parts) + ")")
+            for part in parts:
+                params.extend(part[1])
+            continue
+        
+        if not _FIELD_PATTERN.match(key):
+            raise ValueError(f"不支持的元数据字段: {key}")
+        
+        column = f"json_extract(metadata, '$.{key}')"
+        conditions = value if isinstance(value, dict) else {"$eq": value}
+        for operator, operand in conditions.items():
+            if operator in ("$in", "$nin"):
+                operand = list(operand)
+                if not operand:
+                    clauses.append("0" if operator == "$in" else "1")
+                    continue
+                keyword = "IN" if operator == "$in" else "NOT IN"
+                clauses.append(f"{column} {keyword} ({', '.join('?' * len(operand))})")
+                params.extend(operand)
+            elif operator in _COMPARISON_OPERATORS:
+                clauses.append(f"{column} {_COMPARISON_OPERATORS[operator]} ?")
+                params.append(operand)
+            else:
+                raise ValueError(f"不支持的过滤运算符: {operator}")
+    
+    return "(" + " AND ".join(clauses) + ")", params
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """将向量归一化为单位长度"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    标量量化
+    
+    Args:
+        vectors: float32向量矩阵
+        quantization: float16 或 int8（每个向量按最大绝对值缩放到[-127, 127]）
+    
+    Returns:
+        (量化后的矩阵, int8时每行的缩放系数，否则为None)
+    """
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    if quantization == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"不支持的量化方式: {quantization}")
+
+
+def _block_scores(
+    matrix: np.ndarray,
+    query: np.ndarray,
+    rows: np.ndarray,
+    scales: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    分块计算指定行与查询向量的内积
+    
+    Args:
+        matrix: 向量矩阵（float32、float16或int8）
+        query: 查询向量
+        rows: 行号数组（升序）
+        scales: int8量化的缩放系数
+    
+    Returns:
+        内积数组
+    """
+    scores = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+        block_rows = rows[start:start + SCORE_BLOCK_ROWS]
+        first, last = int(block_rows[0]), int(block_rows[-1]) + 1
+        if last - first == len(block_rows):
+            # 连续行直接切片，避免花式索引复制
+            block = matrix[first:last]
+            block_scales = scales[first:last] if scales is not None else None
+        else:
+            block = matrix[block_rows]
+            block_scales = scales[block_rows] if scales is not None else None
+        
+        block_scores = np.asarray(block, dtype=np.float32) @ query
+        if block_scales is not None:
+            block_scores *= block_scales
+        scores[start:start + len(block_rows)] = block_scores
+    return scores
+
+
+class LocalCollection:
+    """
+    本地向量集合
+    
+    向量归一化后以float32矩阵保存在内存映射文件中，文本和元数据保存在SQLite中，
+    查询时对全部向量做精确的余弦相似度计算，距离为 1 - 余弦相似度。
+    删除的行会在后续写入时复用。
+    
+    启用量化时另存一份float16或int8的紧凑副本，查询先在紧凑副本上粗排，
+    再从float32原始向量中读取候选重新计算精确得分，常驻内存的只有紧凑副本。
+    
+    多个进程可以同时打开同一集合：写入在SQLite写事务（BEGIN IMMEDIATE）中进行，
+    向量文件和元数据的修改由同一把写锁串行化；每次写入递增 info 表中的代数，
+    各进程在读写前发现代数变化时重新加载集合元数据、容量和行状态。
+    共享同一集合的进程应使用相同的量化方式，否则写入时会重新生成紧凑副本。
+    """
+    
+    def __init__(
+        self,
+        directory: Path,
+        name: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        quantization: str = "none",
+        rescore_factor: int = 4
+    ):
+        """
+        Args:
+            directory: 集合目录
+            name: 集合名称
+            metadata: 集合元数据（仅在新建时写入）
+            quantization: 量化方式，none、float16 或 int8
+            rescore_factor: 量化粗排的候选数量为结果数量的倍数
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"不支持的量化方式: {quantization}")
+        
+        self.name = name
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        
+        # 自动提交模式，事务由 _write 和 _refresh 显式开启
+        self._db = sqlite3.connect(
+            str(directory / META_FILE),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=_BUSY_TIMEOUT
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS info (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self._metadata: Optional[Dict[str, Any]] = None
+        self.dim: Optional[int] = None
+        self._capacity = 0
+        # 紧凑副本当前对应的量化方式（info 表中的记录）
+        self._stored_quantization = "none"
+        self._generation: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._quantized: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._live = np.zeros(0, dtype=bool)
+        self._row_limit = 0
+        
+        with self._write():
+            if self._metadata is None and metadata is not None:
+                self._metadata = metadata
+                self._set_info("metadata", json.dumps(metadata, ensure_ascii=False))
+        
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        """集合元数据（可能已被其他进程修改）"""
+        with self._lock:
+            self._refresh()
+            return self._metadata
+    
+    def _set_info(self, key: str, value: Any) -> None:
+        """写入集合信息，需在写事务中调用"""
+        self._db.execute(
+            "INSERT INTO info (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+    
+    def _refresh(self) -> None:
+        """代数变化（其他进程写入过）时重新加载集合信息、行状态和向量文件映射"""
+        in_transaction = self._db.in_transaction
+        if not in_transaction:
+            # 在同一个读事务中读取信息和行，得到一致的快照
+            self._db.execute("BEGIN")
+        try:
+            info = dict(self._db.execute("SELECT key, value FROM info").fetchall())
+            generation = int(info.get("generation", 0))
+            if generation == self._generation:
+                return
+            
+            self._metadata = json.loads(info["metadata"]) if "metadata" in info else None
+            self.dim = int(info["dim"]) if "dim" in info else None
+            self._capacity = int(info.get("capacity", 0))
+            self._stored_quantization = info.get("quantization", "none")
+            
+            self._live = np.zeros(self._capacity, dtype=bool)
+            self._row_limit = 0
+            rows = np.fromiter(
+                (row for (row,) in self._db.execute("SELECT row FROM rows")),
+                dtype=np.int64
+            )
+            if len(rows):
+                self._live[rows] = True
+                self._row_limit = int(rows.max()) + 1
+            
+            self._vectors = self._quantized = self._scales = None
+            if self.dim is not None and self._capacity:
+                self._open_vectors()
+            self._generation = generation
+        finally:
+            if not in_transaction:
+                self._db.execute("COMMIT")
+    
+    @contextmanager
+    def _write(self):
+        """
+        写事务：持有SQLite写锁，先加载其他进程的修改并使紧凑副本与本进程的量化方式一致，
+        有修改时提交前递增代数
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                self._sync_quantization()
+                changes = self._db.total_changes
+                yield
+                self._flush()
+                if self._db.total_changes != changes:
+                    self._generation += 1
+                    self._set_info("generation", self._generation)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                # 内存中的状态可能已修改，下次读写时重新加载
+                self._generation = None
+                raise
+    
+    def _sync_quantization(self) -> None:
+        """使紧凑副本与本进程的量化方式一致，需在写事务中调用"""
+        if self._stored_quantization == self.quantization:
+            return
+        if self.quantization != "none" and self.dim is not None and self._capacity:
+            self._rebuild_quantized()
+        else:
+            # 未启用量化时写入不会更新紧凑副本，记录下来以便再次启用时重新生成
+            self._set_info("quantization", self.quantization)
+            self._stored_quantization = self.quantization
+    
+    def _files(self) -> List[Tuple[str, int]]:
+        """本进程的量化方式下向量相关文件及其每行字节数"""
+        files = [(VECTORS_FILE, self.dim * np.dtype(np.float32).itemsize)]
+        if self.quantization != "none":
+            files.append((QUANTIZED_FILE, self.dim * np.dtype(_QUANTIZED_DTYPES[self.quantization]).itemsize))
+        if self.quantization == "int8":
+            files.append((SCALES_FILE, np.dtype(np.float32).itemsize))
+        return files
+    
+    def _open_vectors(self) -> None:
+        """以读写方式映射向量文件，紧凑副本与本进程的量化方式不一致时不使用"""
+        self._vectors = np.memmap(
+            self.directory / VECTORS_FILE,
+            dtype=np.float32,
+            mode="r+",
+            shape=(self._capacity, self.dim)
+        )
+        self._quantized = self._scales = None
+        if self.quantization == "none" or self._stored_quantization != self.quantization:
+            return
+        self._quantized = np.memmap(
+            self.directory / QUANTIZED_FILE,
+            dtype=_QUANTIZED_DTYPES[self.quantization],
+            mode="r+",
+            shape=(self._capacity, self.dim)
+        )
+        if self.quantization == "int8":
+            self._scales = np.memmap(
+                self.directory / SCALES_FILE,
+                dtype=np.float32,
+                mode="r+",
+                shape=(self._capacity,)
+            )
+    
+    def _flush(self) -> None:
+        """将向量写回文件"""
+        for array in (self._vectors, self._quantized, self._scales):
+            if array is not None:
+                array.flush()
+    
+    def _rebuild_quantized(self) -> None:
+        """量化方式变化时根据float32原始向量重新生成紧凑副本，需在写事务中调用"""
+        for file_name, row_bytes in self._files()[1:]:
+            with open(self.directory / file_name, "wb") as f:
+                f.truncate(self._capacity * row_bytes)
+        self._stored_quantization = self.quantization
+        self._open_vectors()
+        
+        for start in range(0, self._row_limit, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, self._row_limit)
+            codes, scales = quantize(np.asarray(self._vectors[start:end]), self.quantization)
+            self._quantized[start:end] = codes
+            if scales is not None:
+                self._scales[start:end] = scales
+        self._flush()
+        self._set_info("quantization", self.quantization)
+    
+    def _ensure_capacity(self, rows: int) -> None:
+        """
+        扩展向量文件，使其至少能容纳指定行数，需在写事务中调用
+        
+        Args:
+            rows: 需要的行数
+        """
+        if rows <= self._capacity:
+            return
+        
+        capacity = max(INITIAL_CAPACITY, self._capacity)
+        while capacity < rows:
+            capacity *= 2
+        
+        self._flush()
+        for file_name, row_bytes in self._files():
+            with open(self.directory / file_name, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+        self._capacity = capacity
+        self._open_vectors()
+        self._set_info("capacity", capacity)
+    
+    def _allocate(self, count: int) -> np.ndarray:
+        """
+        分配空闲行，优先复用已删除的行；需在写事务中调用，
+        此时行状态已按 rows 表重新加载，且其他进程无法同时分配
+        
+        Args:
+            count: 行数
+        
+        Returns:
+            行号数组
+        """
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        self._ensure_capacity(int(self._live.sum()) + count)
+        return np.flatnonzero(~self._live)[:count]
+    
+    def _select_rows(self, sql: str, params: Sequence[Any]) -> Dict[str, int]:
+        """执行查询，返回文本块ID到行号的映射"""
+        return {chunk_id: row for chunk_id, row in self._db.execute(sql, params).fetchall()}
+    
+    def _rows_for_ids(self, ids: List[str]) -> Dict[str, int]:
+        """按文本块ID查询行号"""
+        rows = {}
+        for start in range(0, len(ids), _SQL_BATCH_SIZE):
+            batch = ids[start:start + _SQL_BATCH_SIZE]
+            rows.update(self._select_rows(
+                f"SELECT chunk_id, row FROM rows WHERE chunk_id IN ({', '.join('?' * len(batch))})",
+                batch
+            ))
+        return rows
+    
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict]] = None
+    ) -> None:
+        """
+        写入向量，ID相同时覆盖
+        
+        Args:
+            ids: 文本块ID列表
+            embeddings: 向量（列表或numpy数组）
+            documents: 文本列表
+            metadatas: 元数据列表
+        """
+        if not len(ids):
+            return
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        vectors = _normalize_rows(vectors)
+        
+        # 同一批次中重复的ID以最后一次为准
+        positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        unique_ids = list(positions)
+        indices = np.fromiter(positions.values(), dtype=np.int64, count=len(unique_ids))
+        
+        with self._write():
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_info("dim", self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"向量维度不匹配: 期望 {self.dim}，实际 {vectors.shape[1]}")
+            
+            existing = self._rows_for_ids(unique_ids)
+            new_ids = [chunk_id for chunk_id in unique_ids if chunk_id not in existing]
+            row_of = dict(existing)
+            row_of.update(zip(new_ids, self._allocate(len(new_ids)).tolist()))
+            rows = np.array([row_of[chunk_id] for chunk_id in unique_ids], dtype=np.int64)
+            
+            # 先写向量再提交元数据，中断时只会留下无人引用的向量
+            self._vectors[rows] = vectors[indices]
+            if self._quantized is not None:
+                codes, scales = quantize(vectors[indices], self.quantization)
+                self._quantized[rows] = codes
+                if scales is not None:
+                    self._scales[rows] = scales
+            self._flush()
+            
+            self._db.executemany("""
+                INSERT INTO rows (row, chunk_id, document, metadata) VALUES (?, ?, ?, ?)
+                ON CONFLICT (chunk_id) DO UPDATE SET
+                    document = excluded.document,
+                    metadata = excluded.metadata
+            """, [
+                (
+                    row_of[chunk_id],
+                    chunk_id,
+                    documents[positions[chunk_id]] if documents else None,
+                    json.dumps(
+                        (metadatas[positions[chunk_id]] if metadatas else None) or {},
+                        ensure_ascii=False
+                    )
+                )
+                for chunk_id in unique_ids
+            ])
+            
+            self._live[rows] = True
+            self._row_limit = max(self._row_limit, int(rows.max()) + 1)
+    
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None:
+        """
+        删除向量，同时指定ids和where时删除同时满足两者的向量
+        
+        Args:
+            ids: 文本块ID列表
+            where: 元数据过滤条件
+        """
+        if ids is None and not where:
+            return
+        
+        with self._write():
+            if ids is not None:
+                rows = self._rows_for_ids(list(ids))
+                if where:
+                    where_sql, params = where_to_sql(where)
+                    matched = self._select_rows(f"SELECT chunk_id, row FROM rows WHERE {where_sql}", params)
+                    rows = {chunk_id: row for chunk_id, row in rows.items() if chunk_id in matched}
+            else:
+                where_sql, params = where_to_sql(where)
+                rows = self._select_rows(f"SELECT chunk_id, row FROM rows WHERE {where_sql}", params)
+            
+            row_numbers = list(rows.values())
+            self._db.executemany("DELETE FROM rows WHERE row = ?", [(row,) for row in row_numbers])
+            self._live[np.array(row_numbers, dtype=np.int64)] = False
+    
+    def query(
+        self,
+        query_embeddings: Sequence,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        查询最相似的向量
+        
+        Args:
+            query_embeddings: 查询向量列表
+            n_results: 每个查询返回的结果数量
+            where: 元数据过滤条件
+            include: 兼容ChromaDB的参数，始终返回文本、元数据和距离
+        
+        Returns:
+            与ChromaDB查询结果格式相同的字典
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        queries = _normalize_rows(queries)
+        
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        
+        with self._lock:
+            self._refresh()
+            vectors, quantized, scales = self._vectors, self._quantized, self._scales
+            limit = self._row_limit
+            live = self._live[:limit].copy()
+            candidates = None
+            if where:
+                where_sql, params = where_to_sql(where)
+                candidates = np.fromiter(
+                    (row for (row,) in self._db.execute(f"SELECT row FROM rows WHERE {where_sql}", params)),
+                    dtype=np.int64
+                )
+        
+        for query in queries:
+            top_rows, top_scores = self._top_k(
+                vectors, quantized, scales, limit, live, candidates, query, n_results
+            )
+            with self._lock:
+                found = {
+                    row: (chunk_id, document, metadata)
+                    for row, chunk_id, document, metadata in self._db.execute(
+                        f"SELECT row, chunk_id, document, metadata FROM rows "
+                        f"WHERE row IN ({', '.join('?' * len(top_rows))})",
+                        top_rows.tolist()
+                    ).fetchall()
+                } if len(top_rows) else {}
+            
+            hits = [(found[row], score) for row, score in zip(top_rows.tolist(), top_scores.tolist()) if row in found]
+            results["ids"].append([hit[0][0] for hit in hits])
+            results["documents"].append([hit[0][1] for hit in hits])
+            results["metadatas"].append([json.loads(hit[0][2]) if hit[0][2] else {} for hit in hits])
+            results["distances"].append([1.0 - score for _, score in hits])
+        
+        return results
+    
+    def _top_k(
+        self,
+        vectors: Optional[np.memmap],
+        quantized: Optional[np.memmap],
+        scales: Optional[np.memmap],
+        limit: int,
+        live: np.ndarray,
+        candidates: Optional[np.ndarray],
+        query: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算相似度最高的k行；启用量化时先在紧凑副本上粗排，再用float32原始向量重新打分
+        
+        Returns:
+            (行号数组, 相似度数组)，按相似度降序
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        if vectors is None or limit == 0 or k <= 0:
+            return empty
+        
+        if candidates is None:
+            rows = np.flatnonzero(live)
+        else:
+            rows = np.sort(candidates[candidates < limit])
+        
+        if len(rows) == 0:
+            return empty
+        
+        if quantized is not None:
+            shortlist = min(len(rows), k * self.rescore_factor)
+            coarse = _block_scores(quantized, query, rows, scales)
+            rows = np.sort(rows[np.argpartition(-coarse, shortlist - 1)[:shortlist]])
+        
+        scores = _block_scores(vectors, query, rows)
+        
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+    
+    def modify(self, name: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        修改集合元数据（不支持重命名）
+        
+        Args:
+            name: 新名称
+            metadata: 新元数据
+        """
+        if name is not None and name != self.name:
+            raise ValueError("本地向量索引不支持重命名集合")
+        if metadata is not None:
+            with self._write():
+                self._metadata = metadata
+                self._set_info("metadata", json.dumps(metadata, ensure_ascii=False))
+    
+    def count(self) -> int:
+        """获取向量数量"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+    
+    def close(self) -> None:
+        """关闭数据库连接和内存映射"""
+        with self._lock:
+            self._flush()
+            self._vectors = self._quantized = self._scales = None
+            self._db.close()
+
+
+class LocalVectorClient:
+    """
+    本地向量索引客户端
+    
+    实现 ChromaService 使用的ChromaDB客户端API子集，每个集合保存在根目录下的同名子目录中，
+    查询在进程内完成，不经过网络。
+    """
+    
+    def __init__(self, path: str, quantization: str = "none", rescore_factor: int = 4):
+        """
+        Args:
+            path: 索引根目录
+            quantization: 量化方式，none、float16 或 int8
+            rescore_factor: 量化粗排的候选数量为结果数量的倍数
+        """
+        self.path = Path(path)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+    
+    def _directory(self, name: str) -> Path:
+        """集合目录"""
+        if not _NAME_PATTERN.match(name):
+            raise ValueError(f"集合名称不合法: {name}")
+        return self.path / name
+    
+    def _exists(self, name: str) -> bool:
+        """集合是否存在"""
+        return (self._directory(name) / META_FILE).exists()
+    
+    def _open(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> LocalCollection:
+        """打开集合，不存在时创建"""
+        with self._lock:
+            if name in self._collections and not self._exists(name):
+                # 集合已被其他进程删除
+                self._collections.pop(name).close()
+            if name not in self._collections:
+                self._collections[name] = LocalCollection(
+                    self._directory(name),
+                    name,
+                    metadata,
+                    quantization=self.quantization,
+                    rescore_factor=self.rescore_factor
+                )
+            return self._collections[name]
+    
+    def get_collection(self, name: str) -> LocalCollection:
+        """获取已存在的集合"""
+        if not self._exists(name):
+            raise ValueError(f"集合不存在: {name}")
+        return self._open(name)
+    
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> LocalCollection:
+        """创建集合"""
+        if self._exists(name):
+            raise ValueError(f"集合已存在: {name}")
+        return self._open(name, metadata)
+    
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> LocalCollection:
+        """获取集合，不存在时创建"""
+        return self._open(name, metadata)
+    
+    def list_collections(self) -> List[LocalCollection]:
+        """列出所有集合"""
+        return [
+            self._open(directory.name)
+            for directory in sorted(self.path.iterdir())
+            if (directory / META_FILE).exists()
+        ]
+    
+    def delete_collection(self, name: str) -> None:
+        """删除集合及其文件"""
+        if not self._exists(name):
+            raise ValueError(f"集合不存在: {name}")
+        
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(self._directory(name))
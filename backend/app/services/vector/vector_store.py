@@ -0,0 +1,106 @@
+"""
+向量存储后端模块
+"""
+from typing import List, Dict, Optional, Any, Protocol, Sequence
+from app.core.config import settings
+
+VECTOR_STORE_BACKENDS = ("chroma_http", "chroma_local", "local")
+
+
+class VectorCollection(Protocol):
+    """
+    向量集合接口
+    
+    ChromaService 只使用ChromaDB集合API的以下子集，任何实现这些方法的集合都可以作为后端。
+    """
+    
+    name: str
+    metadata: Optional[Dict[str, Any]]
+    
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Sequence,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict]] = None
+    ) -> None:
+        ...
+    
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> None:
+        ...
+    
+    def query(
+        self,
+        query_embeddings: Sequence,
+        n_results: int = 10,
+        where: Optional[Dict] = None
+    ) -> Dict:
+        ...
+    
+    def modify(self, name: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
+        ...
+    
+    def count(self) -> int:
+        ...
+
+
+class VectorStoreClient(Protocol):
+    """向量存储客户端接口，对应ChromaDB客户端API的子集"""
+    
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> VectorCollection:
+        ...
+    
+    def get_collection(self, name: str) -> VectorCollection:
+        ...
+    
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> VectorCollection:
+        ...
+    
+    def list_collections(self) -> List[VectorCollection]:
+        ...
+    
+    def delete_collection(self, name: str) -> None:
+        ...
+
+
+def create_vector_client(backend: Optional[str] = None) -> VectorStoreClient:
+    """
+    根据配置创建向量存储客户端
+    
+    Args:
+        backend: 后端类型，默认使用 VECTOR_STORE_BACKEND：
+            chroma_http 连接独立部署的ChromaDB服务；
+            chroma_local 在进程内使用持久化到本地目录的ChromaDB；
+            local 使用进程内的内存映射向量索引，不依赖ChromaDB服务
+    
+    Returns:
+        向量存储客户端
+    """
+    backend = backend or settings.VECTOR_STORE_BACKEND
+    
+    if backend == "chroma_http":
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+        return chromadb.HttpClient(
+            host=settings.CHROMA_HOST,
+            port=settings.CHROMA_PORT,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+    
+    if backend == "chroma_local":
+        import chromadb
+        from chromadb.config import Settings as ChromaSettings
+        return chromadb.PersistentClient(
+            path=settings.CHROMA_PERSIST_DIR,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+    
+    if backend == "local":
+        from app.services.vector.local_store import LocalVectorClient
+        return LocalVectorClient(
+            settings.LOCAL_INDEX_DIR,
+            quantization=settings.LOCAL_INDEX_QUANTIZATION,
+            rescore_factor=settings.LOCAL_INDEX_RESCORE_FACTOR
+        )
+    
+    raise ValueError(f"不支持的向量存储后端: {backend}，可选值: {', '.join(VECTOR_STORE_BACKENDS)}")
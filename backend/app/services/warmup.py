@@ -0,0 +1,93 @@
+"""
+服务预热与就绪状态模块
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Callable, Any
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupService:
+    """
+    服务预热
+    
+    API启动后在后台依次加载嵌入模型、连接向量存储、加载重排序模型，失败时定期重试，
+    全部完成前就绪检查返回未就绪，负载均衡不会把请求转发到尚未预热的实例。
+    """
+    
+    def __init__(self):
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+    
+    def _steps(self) -> Dict[str, Callable[[], None]]:
+        """需要预热的组件"""
+        from app.services.vector.chroma_service import chroma_service
+        from app.services.rag.reranker import reranker
+        
+        steps = {"vector_service": chroma_service.warmup}
+        if settings.RERANK_ENABLED:
+            steps["reranker"] = reranker.warmup
+        return steps
+    
+    @property
+    def ready(self) -> bool:
+        """所有组件是否已预热完成，未启用启动预热时始终就绪（组件在首次请求时加载）"""
+        if not settings.WARMUP_ON_STARTUP:
+            return True
+        return bool(self.components) and all(
+            component["status"] == "ready" for component in self.components.values()
+        )
+    
+    async def run(self) -> None:
+        """执行预热，失败的组件按 WARMUP_RETRY_SECONDS 间隔重试"""
+        self.started_at = time.time()
+        steps = self._steps()
+        self.components = {name: {"status": "pending", "error": None} for name in steps}
+        
+        while True:
+            for name, step in steps.items():
+                component = self.components[name]
+                if component["status"] == "ready":
+                    continue
+                
+                started = time.perf_counter()
+                try:
+                    await run_in_threadpool(step)
+                except Exception as e:
+                    logger.warning("预热失败: %s - %s", name, e)
+                    component.update(status="failed", error=f"{type(e).__name__}: {e}")
+                else:
+                    component.update(
+                        status="ready",
+                        error=None,
+                        seconds=round(time.perf_counter() - started, 3)
+                    )
+                    logger.info("预热完成: %s (%.1fs)", name, component["seconds"])
+            
+            if self.ready:
+                self.finished_at = time.time()
+                return
+            await asyncio.sleep(settings.WARMUP_RETRY_SECONDS)
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        获取就绪状态
+        
+        Returns:
+            包含 ready 和各组件状态的字典
+        """
+        return {
+            "ready": self.ready,
+            "components": self.components,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+# 创建全局实例
+warmup_service = WarmupService()
@@ -0,0 +1,133 @@
+"""
+Check that the ONNX Runtime embedder matches the PyTorch (sentence-transformers) embedder
+
+Encodes chunks from the documents directory with both backends and reports:
+  - per-chunk cosine similarity between the two vectors
+  - recall@k of retrieval with ONNX query vectors against the PyTorch-embedded
+    corpus (the mixed case while an existing index is queried by the new backend)
+    and with ONNX vectors on both sides (after a full rebuild)
+
+Usage:
+    python scripts/check_embedder_parity.py              # float32 ONNX model
+    python scripts/check_embedder_parity.py --quantize   # dynamic int8 ONNX model
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.rag.document_processor import document_processor
+from app.services.vector.embedder import OnnxEmbedder, SentenceTransformerEmbedder
+
+DEFAULT_QUERIES = [
+    "员工请假需要提前多久申请？",
+    "加班费如何计算？",
+    "出差报销的标准是什么？",
+    "试用期员工可以享受年假吗？",
+    "违反保密规定会受到什么处分？",
+    "劳动合同到期后如何续签？",
+    "公司的考勤制度有哪些规定？",
+    "采购审批流程是怎样的？"
+]
+
+
+def load_chunks(directory: str, limit: int) -> list:
+    """Collect up to `limit` chunks from the documents directory"""
+    chunks = []
+    for file_path in document_processor.iter_files(directory):
+        try:
+            chunks.extend(document_processor.process_document(file_path)["chunks"])
+        except Exception as e:
+            print(f"  skipped {file_path}: {e}")
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+
+def encode(embedder, texts: list, label: str) -> np.ndarray:
+    """Encode texts and report throughput"""
+    started = time.perf_counter()
+    embeddings = embedder.encode(texts)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.2f}s  ({len(texts) / elapsed:.1f} texts/s)")
+    return embeddings
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = normalize(queries) @ normalize(corpus).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(expected: np.ndarray, actual: np.ndarray) -> float:
+    hits = sum(len(set(e) & set(a)) for e, a in zip(expected, actual))
+    return hits / expected.size
+
+
+def check_parity(args) -> bool:
+    print("=== Embedder Parity Check ===")
+    print(f"Model: {settings.EMBEDDING_MODEL}")
+    print(f"ONNX: {'dynamic int8' if args.quantize else 'float32'}\n")
+    
+    chunks = load_chunks(args.documents, args.limit)
+    if not chunks:
+        print(f"Error: no chunks found in '{args.documents}'")
+        return False
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        queries = [line.strip() for line in Path(args.queries).read_text(encoding="utf-8").splitlines() if line.strip()]
+    print(f"Chunks: {len(chunks)}, queries: {len(queries)}\n")
+    
+    reference = SentenceTransformerEmbedder(settings.EMBEDDING_MODEL, device=settings.EMBEDDING_DEVICE)
+    candidate = OnnxEmbedder(
+        settings.EMBEDDING_MODEL,
+        quantize=args.quantize,
+        threads=settings.EMBEDDING_ONNX_THREADS
+    )
+    
+    reference_corpus = encode(reference, chunks, "PyTorch corpus")
+    candidate_corpus = encode(candidate, chunks, f"{candidate.name} corpus")
+    reference_queries = reference.encode(queries)
+    candidate_queries = candidate.encode(queries)
+    
+    cosine = np.sum(normalize(reference_corpus) * normalize(candidate_corpus), axis=1)
+    k = min(args.top_k, len(chunks))
+    expected = top_k(reference_queries, reference_corpus, k)
+    mixed_recall = recall_at_k(expected, top_k(candidate_queries, reference_corpus, k))
+    rebuilt_recall = recall_at_k(expected, top_k(candidate_queries, candidate_corpus, k))
+    
+    print(f"\n=== Results ===")
+    print(f"Cosine similarity: min {cosine.min():.5f}, mean {cosine.mean():.5f}")
+    print(f"Recall@{k} (ONNX queries, PyTorch index): {mixed_recall:.3f}")
+    print(f"Recall@{k} (ONNX queries, ONNX index):    {rebuilt_recall:.3f}")
+    
+    passed = (
+        cosine.min() >= args.min_cosine
+        and mixed_recall >= args.min_recall
+        and rebuilt_recall >= args.min_recall
+    )
+    print(f"\n{'PASS' if passed else 'FAIL'} "
+          f"(min cosine >= {args.min_cosine}, recall >= {args.min_recall})")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ONNX Runtime and PyTorch embeddings")
+    parser.add_argument("--quantize", action="store_true", help="check the dynamic int8 ONNX model")
+    parser.add_argument("--documents", default=settings.DOCUMENTS_DIR, help="directory to sample chunks from")
+    parser.add_argument("--queries", help="file with one query per line (defaults to built-in questions)")
+    parser.add_argument("--limit", type=int, default=500, help="maximum number of chunks to encode")
+    parser.add_argument("--top-k", type=int, default=settings.TOP_K, help="k for recall@k")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="minimum per-chunk cosine similarity")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="minimum recall@k")
+    args = parser.parse_args()
+    sys.exit(0 if check_parity(args) else 1)
@@ -1,19 +1,29 @@
 """
 Process documents and add to vector database
+
+Usage:
+    python scripts/process_documents.py                # re-embed every document
+    python scripts/process_documents.py --incremental  # only new/changed documents
+    python scripts/process_documents.py --rebuild      # build a new collection version and switch to it
 """
+import argparse
 import sys
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.core.config import settings
+from app.core.database import SessionLocal, run_migrations
 from app.services.rag.document_processor import document_processor
 from app.services.vector.chroma_service import chroma_service
+from app.services.ingestion.manifest import manifest_service
+import app.models  # noqa: F401  register tables
 
 
-def process_all_documents():
-    """Process all documents in data/documents directory"""
-    documents_dir = Path("data/documents")
+def process_all_documents(incremental: bool = False, rebuild: bool = False):
+    """Process all documents in the documents directory"""
+    documents_dir = Path(settings.DOCUMENTS_DIR)
     
     if not documents_dir.exists():
         print(f"Error: Directory '{documents_dir}' does not exist")
@@ -24,40 +34,68 @@ def process_all_documents():
     
     # Get all files
     files = list(documents_dir.glob("*"))
-    if not files:
+    if not files and not incremental:
         print("No files found in directory")
         return
     
     print(f"Found {len(files)} files\n")
     
-    # Process directory
-    results = document_processor.process_directory(str(documents_dir))
-    
-    if not results:
-        print("\nNo documents were processed successfully")
-        return
+    run_migrations()
+    db = SessionLocal()
     
-    # Add to vector database
-    print("\n=== Adding to Vector Database ===")
-    total_chunks = 0
+    def on_progress(stats):
+        print(f"  {stats['total_chunks']} chunks written "
+              f"({stats['documents_processed']} documents parsed)", end="\r")
     
-    for result in results:
-        try:
-            chroma_service.add_documents(
-                documents=result["chunks"],
-                metadatas=result["metadatas"]
+    try:
+        # Stream documents through parse -> embed -> write with bounded memory
+        if incremental:
+            print("=== Syncing Changed Documents ===\n")
+            stats = manifest_service.sync(db, str(documents_dir), on_progress=on_progress)
+        elif rebuild:
+            print("=== Rebuilding Into New Collection Version ===\n")
+            stats = manifest_service.rebuild(db, str(documents_dir), on_progress=on_progress)
+            print(f"\nSwitched to collection: {stats['collection']}")
+            print(f"Removed old versions: {', '.join(stats['removed_versions']) or 'none'}")
+        else:
+            print("=== Processing Documents ===\n")
+            stats = manifest_service.index_files(
+                db,
+                list(document_processor.iter_files(str(documents_dir))),
+                on_progress=on_progress
             )
-            total_chunks += len(result["chunks"])
-            print(f"Added {len(result['chunks'])} chunks from {result['source']}")
-        except Exception as e:
-            print(f"Error adding {result['source']}: {str(e)}")
-    
-    print(f"\n=== Summary ===")
-    print(f"Documents processed: {len(results)}")
-    print(f"Total chunks added: {total_chunks}")
+    finally:
+        db.close()
+    
+    print(f"\n\n=== Summary ===")
+    if incremental:
+        print(f"Added: {stats['added']}, changed: {stats['changed']}, "
+              f"removed: {stats['removed']}, unchanged: {stats['unchanged']}")
+    print(f"Documents processed: {stats['documents_processed']}")
+    print(f"Documents failed: {len(stats['failures'])}")
+    print(f"Total chunks added: {stats['total_chunks']}")
     print(f"Vector database size: {chroma_service.count()}")
+    if chroma_service.chunk_cache is not None:
+        cache_stats = chroma_service.chunk_cache.stats()
+        print(f"Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['path']})")
+    
+    for failure in stats["failures"]:
+        print(f"  - {failure['path']}: {failure['error']}")
 
 
 if __name__ == "__main__":
-    process_all_documents()
+    parser = argparse.ArgumentParser(description="Process documents and add to vector database")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-embed new or changed documents and remove deleted ones"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="build a fresh collection version, then switch readers to it atomically"
+    )
+    args = parser.parse_args()
+    process_all_documents(incremental=args.incremental, rebuild=args.rebuild)
 
@@ -262,7 +262,7 @@ async function handleUpload() {
     try {
         const result = await API.uploadDocument(file);
         
-        alert(`文档上传成功！\n文件名: ${result.filename}\n处理的文本块: ${result.chunks_count}`);
+        alert(`文档上传成功，正在后台处理！\n文件名: ${result.filename}\n任务ID: ${result.job_id}`);
         
         // Clear input
         fileInput.value = '';
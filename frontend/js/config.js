@@ -90,12 +90,13 @@ const API = {
         });
     },
 
-    async chat(message, conversationId = null) {
+    async chat(message, conversationId = null, filters = null) {
         return this.request(API_CONFIG.ENDPOINTS.CHAT, {
             method: 'POST',
             body: JSON.stringify({
                 message,
                 conversation_id: conversationId,
+                filters,
             }),
         });
     },
@@ -118,10 +119,13 @@ const API = {
         });
     },
 
-    async uploadDocument(file) {
+    async uploadDocument(file, category = null) {
         const token = localStorage.getItem(STORAGE_KEYS.TOKEN);
         const formData = new FormData();
         formData.append('file', file);
+        if (category) {
+            formData.append('category', category);
+        }
 
         const response = await fetch(`${API_CONFIG.BASE_URL}${API_CONFIG.ENDPOINTS.KNOWLEDGE}/upload`, {
             method: 'POST',